@@ -37,6 +37,11 @@ setup(
     packages=find_packages(exclude=["tests", "venv", "outputs", "pdfs", "exam"]),
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        # Faster reading and writing of large image_descriptions.json files,
+        # and SIMD base64 encoding of images sent to Ollama
+        'fast': ['orjson>=3.9', 'pybase64>=1.3'],
+    },
     python_requires=">=3.8",
     entry_points={
         'console_scripts': [
@@ -109,11 +109,11 @@ def config_command(show=False, validate=False):
             console.print("[cyan]Testing Ollama connection...[/cyan]")
 
             from src.ollama.client import OllamaClient
-            client = OllamaClient()
-            if client.check_availability():
-                console.print("[green]✓ Ollama is available[/green]")
-            else:
-                console.print("[yellow]⚠ Ollama not available[/yellow]")
+            with OllamaClient() as client:
+                if client.check_availability():
+                    console.print("[green]✓ Ollama is available[/green]")
+                else:
+                    console.print("[yellow]⚠ Ollama not available[/yellow]")
 
             console.print("\n[green]✓ Configuration is valid[/green]")
 
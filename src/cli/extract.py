@@ -53,8 +53,9 @@ def extract_command(unit_filter=None, no_images=False, no_describe=False):
     # Get units to process
     all_units = config.get_all_units()
     if unit_filter:
-        # Filter by unit name
-        units = {k: v for k, v in all_units.items() if v['unit_name'] == unit_filter}
+        # Look up the unit's PDF through the config's unit index
+        pdf_filename = config.get_pdf_for_unit(unit_filter)
+        units = {pdf_filename: all_units[pdf_filename]} if pdf_filename else {}
         if not units:
             console.print(f"[red]✗ Unit '{unit_filter}' not found in config[/red]")
             return False
@@ -115,7 +116,9 @@ def extract_command(unit_filter=None, no_images=False, no_describe=False):
 
             try:
                 # Extract PDF content
-                with PDFProcessor(pdf_path, unit_name) as processor:
+                with PDFProcessor(
+                    pdf_path, unit_name, png_compress_level=config.png_compress_level
+                ) as processor:
                     # Extract text
                     pages_data = processor.extract_text_by_page()
                     logger.info(f"{unit_name}: Extracted {len(pages_data)} pages")
@@ -130,16 +133,17 @@ def extract_command(unit_filter=None, no_images=False, no_describe=False):
                         logger.info(f"{unit_name}: Extracted {len(images)} images")
                         stats['total_images'] += len(images)
 
+                    # Take existing descriptions from the shared store before
+                    # this run's images replace the unit's entries in it
+                    md_gen = MarkdownGenerator(pages_data, images, unit_name, metadata_store)
+
+                    if images:
                         # Add to metadata store
                         metadata_store.add_images(images, unit_name)
 
-                # Generate markdown
-                md_gen = MarkdownGenerator(pages_data, images, unit_name)
-                markdown = md_gen.generate_markdown()
-
-                # Save markdown
-                utils.save_file(markdown_path, markdown)
-                logger.info(f"{unit_name}: Saved markdown ({len(markdown)} chars)")
+                # Generate markdown and write it out section by section
+                markdown_chars = utils.save_file(markdown_path, md_gen.iter_markdown_chunks())
+                logger.info(f"{unit_name}: Saved markdown ({markdown_chars} chars)")
 
                 stats['successful_pdfs'] += 1
 
@@ -157,8 +161,10 @@ def extract_command(unit_filter=None, no_images=False, no_describe=False):
         from src.ollama.vision import describe_images_batch
 
         try:
+            # Reuse the client (and its open connection) from the availability check
             described_count = describe_images_batch(
                 metadata_store,
+                client=client,
                 console=console,
                 progress=True
             )
@@ -166,6 +172,8 @@ def extract_command(unit_filter=None, no_images=False, no_describe=False):
             console.print(f"[green]✓ Generated {described_count} descriptions[/green]")
         except Exception as e:
             console.print(f"[yellow]⚠ Image description failed: {e}[/yellow]")
+        finally:
+            client.close()
 
     # Save metadata
     if stats['total_images'] > 0:
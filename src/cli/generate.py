@@ -14,7 +14,13 @@ from src.config import load_config
 console = Console()
 
 
-def generate_command(unit_name: str = None, show_images: bool = False, provider: str = None):
+def generate_command(
+    unit_name: str = None,
+    show_images: bool = False,
+    provider: str = None,
+    no_cache: bool = False,
+    parallel: int = None
+):
     """
     Generate flashcards for a unit using Claude or Ollama.
 
@@ -22,6 +28,9 @@ def generate_command(unit_name: str = None, show_images: bool = False, provider:
         unit_name: Unit name (e.g., 'unit1_introduction'), or None to generate all units
         show_images: Display image descriptions in output
         provider: Override provider ('claude' or 'ollama')
+        no_cache: Regenerate even if an identical request was cached
+        parallel: Number of units to generate concurrently (Ollama, all units only);
+            uses generation.ollama.max_parallel if None
     """
     from src.flashcards.factory import create_card_generator
 
@@ -41,16 +50,30 @@ def generate_command(unit_name: str = None, show_images: bool = False, provider:
 
         console.print(f"[cyan]Generating flashcards for all {len(all_units)} units...[/cyan]\n")
 
-        results = []
-        for pdf_filename, unit_info in all_units.items():
-            success = _generate_single_unit(
-                config,
-                unit_info['unit_name'],
-                show_images,
-                provider
-            )
-            results.append((unit_info['unit_name'], success))
-            console.print()  # Add spacing between units
+        if parallel is None:
+            parallel = config.ollama_generation_max_parallel
+
+        if parallel > 1 and (provider or config.generation_provider) == 'ollama':
+            results = _generate_units_concurrently(config, all_units, provider, no_cache, parallel)
+        else:
+            # One generator for every unit so its HTTP connections are reused
+            generator = create_card_generator(config, provider=provider, use_cache=not no_cache)
+            results = []
+            try:
+                for pdf_filename, unit_info in all_units.items():
+                    success = _generate_single_unit(
+                        config,
+                        unit_info['unit_name'],
+                        show_images,
+                        provider,
+                        no_cache,
+                        generator
+                    )
+                    results.append((unit_info['unit_name'], success))
+                    console.print()  # Add spacing between units
+            finally:
+                if hasattr(generator, 'close'):
+                    generator.close()
 
         # Display summary
         console.print(Panel.fit(
@@ -76,10 +99,90 @@ def generate_command(unit_name: str = None, show_images: bool = False, provider:
             console.print(f"  [dim]- {info['unit_name']}[/dim]")
         return False
 
-    return _generate_single_unit(config, unit_name, show_images, provider)
+    return _generate_single_unit(config, unit_name, show_images, provider, no_cache)
+
+
+def _generate_units_concurrently(
+    config,
+    all_units: dict,
+    provider: str = None,
+    no_cache: bool = False,
+    parallel: int = 2
+) -> list:
+    """
+    Generate flashcards for all units with concurrent Ollama requests.
 
+    Args:
+        config: Config object
+        all_units: Unit configurations keyed by PDF filename
+        provider: Override provider ('claude' or 'ollama')
+        no_cache: Regenerate even if an identical request was cached
+        parallel: Maximum number of units generated at the same time
 
-def _generate_single_unit(config, unit_name: str, show_images: bool = False, provider: str = None) -> bool:
+    Returns:
+        List of (unit_name, success) tuples
+    """
+    import asyncio
+    from src.flashcards.factory import create_card_generator
+
+    results = []
+    targets = {}
+    for pdf_filename, unit_info in all_units.items():
+        unit_name = unit_info['unit_name']
+        if not os.path.exists(f"{config.markdown_dir}/{unit_name}.md"):
+            console.print(f"[red]✗ {unit_name}: markdown file not found[/red]")
+            results.append((unit_name, False))
+            continue
+        targets[unit_name] = unit_info.get('target_cards', 50)
+
+    if not targets:
+        return results
+
+    try:
+        generator = create_card_generator(config, provider=provider, use_cache=not no_cache)
+    except Exception as e:
+        console.print(f"[red]✗ Could not create generator: {e}[/red]")
+        return results + [(unit_name, False) for unit_name in targets]
+
+    console.print(
+        f"[cyan]Running up to {parallel} units at once "
+        f"(start Ollama with OLLAMA_NUM_PARALLEL={parallel})...[/cyan]\n"
+    )
+    try:
+        with console.status("Generating flashcards..."):
+            output_paths = asyncio.run(
+                generator.generate_many(targets, output_dir=config.anki_dir, concurrency=parallel)
+            )
+
+        for unit_name in targets:
+            output_path = output_paths.get(unit_name)
+            if output_path is None:
+                console.print(f"[red]✗ {unit_name}: generation failed (see log)[/red]")
+                results.append((unit_name, False))
+                continue
+
+            validation = generator.validate_output(output_path)
+            if validation['valid']:
+                console.print(f"[green]✓ {unit_name}: {validation['card_count']} cards → {output_path}[/green]")
+            else:
+                console.print(f"[yellow]⚠ {unit_name}: generated with issues → {output_path}[/yellow]")
+            results.append((unit_name, True))
+    finally:
+        if hasattr(generator, 'close'):
+            generator.close()
+
+    console.print()
+    return results
+
+
+def _generate_single_unit(
+    config,
+    unit_name: str,
+    show_images: bool = False,
+    provider: str = None,
+    no_cache: bool = False,
+    generator=None
+) -> bool:
     """
     Generate flashcards for a single unit.
 
@@ -88,6 +191,8 @@ def _generate_single_unit(config, unit_name: str, show_images: bool = False, pro
         unit_name: Unit name (e.g., 'unit1_introduction')
         show_images: Display image descriptions in output
         provider: Override provider ('claude' or 'ollama')
+        no_cache: Regenerate even if an identical request was cached
+        generator: Existing generator to reuse (created if None)
 
     Returns:
         True if successful, False otherwise
@@ -110,7 +215,8 @@ def _generate_single_unit(config, unit_name: str, show_images: bool = False, pro
         return False
 
     # Create generator early to calculate actual target
-    generator = create_card_generator(config, provider=provider)
+    if generator is None:
+        generator = create_card_generator(config, provider=provider, use_cache=not no_cache)
 
     # Calculate actual target based on page count (1.5 cards per page)
     page_count = generator.get_pdf_page_count(unit_name)
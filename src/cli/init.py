@@ -82,7 +82,8 @@ def init_command():
             'extract_images': True,
             'min_image_size': [100, 100],
             'image_format': 'png',
-            'image_quality': 95
+            'image_quality': 95,
+            'png_compress_level': 1
         },
         'output': {
             'markdown_dir': 'outputs/markdown',
@@ -105,6 +106,7 @@ def init_command():
             'timeout': 30,
             'batch_size': 5,
             'max_retries': 3,
+            'max_parallel': 1,
             'description_length': 'concise'
         }
     }
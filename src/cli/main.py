@@ -54,10 +54,14 @@ def extract(unit, no_images, no_describe):
 @click.option('--show-images', is_flag=True, help='Display image descriptions in output')
 @click.option('--provider', '-p', type=click.Choice(['claude', 'ollama']),
               help='Override card generation provider (uses config default if not specified)')
-def generate(unit, show_images, provider):
+@click.option('--no-cache', is_flag=True, help='Regenerate even if an identical request was cached')
+@click.option('--parallel', type=click.IntRange(min=1),
+              help='Units to generate concurrently with Ollama (default: generation.ollama.max_parallel; '
+                   'set OLLAMA_NUM_PARALLEL to match)')
+def generate(unit, show_images, provider, no_cache, parallel):
     """Generate flashcards from markdown using Claude or Ollama."""
     from src.cli.generate import generate_command
-    generate_command(unit, show_images, provider)
+    generate_command(unit, show_images, provider, no_cache, parallel)
 
 
 @cli.command()
@@ -24,6 +24,11 @@ class Config:
         self.config_path = config_path
         self.config = self._load_config()
 
+        # Resolved units and unit_name -> PDF index, rebuilt when pdfs/ changes
+        self._units_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._units_cache_key: Optional[int] = None
+        self._unit_to_pdf: Dict[str, str] = {}
+
     def _load_config(self) -> Dict[str, Any]:
         """
         Load configuration from YAML file.
@@ -181,6 +186,22 @@ class Config:
                 - tags: List[str]
                 - source: str ('auto-discovered', 'configured', or 'configured-only')
         """
+        # Discovery globs pdfs/, so reuse the result until the directory changes
+        pdfs_path = Path("pdfs")
+        cache_key = pdfs_path.stat().st_mtime_ns if pdfs_path.exists() else None
+        if self._units_cache is None or cache_key != self._units_cache_key:
+            self._units_cache = self._resolve_units()
+            self._units_cache_key = cache_key
+            self._unit_to_pdf = {
+                info.get('unit_name'): pdf_file
+                for pdf_file, info in self._units_cache.items()
+            }
+
+        # Callers may modify the returned dicts
+        return {pdf_file: dict(info) for pdf_file, info in self._units_cache.items()}
+
+    def _resolve_units(self) -> Dict[str, Dict[str, Any]]:
+        """Build unit configurations from discovered PDFs and config overrides."""
         # Get default target cards
         default_target_cards = self.default_target_cards
 
@@ -228,10 +249,21 @@ class Config:
             Unit configuration dictionary or None if not found
         """
         units = self.get_all_units()
-        for pdf_filename, unit_info in units.items():
-            if unit_info.get('unit_name') == unit_name:
-                return unit_info
-        return None
+        pdf_filename = self._unit_to_pdf.get(unit_name)
+        return units[pdf_filename] if pdf_filename is not None else None
+
+    def get_pdf_for_unit(self, unit_name: str) -> Optional[str]:
+        """
+        Get the PDF filename for a unit.
+
+        Args:
+            unit_name: Unit name (e.g., 'unit1_introduction')
+
+        Returns:
+            PDF filename or None if no unit has that name
+        """
+        self.get_all_units()
+        return self._unit_to_pdf.get(unit_name)
 
     @property
     def default_target_cards(self) -> int:
@@ -254,6 +286,11 @@ class Config:
         """Image format."""
         return self.get('processing.image_format', 'png')
 
+    @property
+    def png_compress_level(self) -> int:
+        """zlib compression level (0-9) for extracted images saved as PNG."""
+        return self.get('processing.png_compress_level', 1)
+
     @property
     def markdown_dir(self) -> str:
         """Markdown output directory."""
@@ -310,11 +347,21 @@ class Config:
         """Get subject description."""
         return self.get('subject.description', 'Educational materials')
 
+    @property
+    def ollama_max_parallel(self) -> int:
+        """Get how many images to describe concurrently with Ollama (match OLLAMA_NUM_PARALLEL)."""
+        return self.get('ollama.max_parallel', 1)
+
     @property
     def generation_provider(self) -> str:
         """Get card generation provider (claude or ollama)."""
         return self.get('generation.provider', 'claude')
 
+    @property
+    def response_cache_enabled(self) -> bool:
+        """Get whether generated flashcards are cached by exact request."""
+        return self.get('generation.response_cache', True)
+
     @property
     def claude_model(self) -> str:
         """Get Claude model name."""
@@ -330,6 +377,11 @@ class Config:
         """Get Claude max tokens."""
         return self.get('generation.claude.max_tokens', 16000)
 
+    @property
+    def claude_tokens_per_card(self) -> int:
+        """Get estimated output tokens per card, used to size max_tokens per unit."""
+        return self.get('generation.claude.tokens_per_card', 180)
+
     @property
     def ollama_generation_base_url(self) -> str:
         """Get Ollama base URL for card generation."""
@@ -355,6 +407,36 @@ class Config:
         """Get Ollama temperature for card generation."""
         return self.get('generation.ollama.temperature', 0.7)
 
+    @property
+    def ollama_generation_num_ctx(self) -> int:
+        """Get the minimum context window (num_ctx) Ollama allocates for card generation."""
+        return self.get('generation.ollama.num_ctx', 8192)
+
+    @property
+    def ollama_generation_keep_alive(self) -> str:
+        """Get how long Ollama keeps the generation model loaded between requests."""
+        return self.get('generation.ollama.keep_alive', '30m')
+
+    @property
+    def ollama_generation_max_parallel(self) -> int:
+        """Get how many units to generate concurrently with Ollama (match OLLAMA_NUM_PARALLEL)."""
+        return self.get('generation.ollama.max_parallel', 1)
+
+    @property
+    def ollama_generation_compress_requests(self) -> bool:
+        """Get whether to gzip large Ollama generation request bodies."""
+        return self.get('generation.ollama.compress_requests', False)
+
+    @property
+    def ollama_generation_tokenizer(self) -> Optional[str]:
+        """Get the Hugging Face tokenizer name used to count prompt tokens, if set."""
+        return self.get('generation.ollama.tokenizer')
+
+    @property
+    def ollama_generation_early_stop(self) -> bool:
+        """Get whether to end Ollama generation once enough cards have streamed in."""
+        return self.get('generation.ollama.early_stop', True)
+
     def get_prompt_template(self, template_name: str) -> str:
         """
         Get prompt template with subject context interpolated.
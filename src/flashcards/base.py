@@ -2,8 +2,101 @@
 Abstract base class for flashcard generation providers.
 """
 
+import functools
+import hashlib
+import itertools
+import logging
+import mmap
+import os
+import shutil
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Callable
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from src.pdf_processor import PDFProcessor
+from src.utils import read_json
+
+logger = logging.getLogger(__name__)
+
+
+# Anki TSV header lines, kept as bytes so validation can skip decoding them
+EXPECTED_HEADERS = (b'#separator:tab', b'#html:true', b'#tags column:3')
+COLUMN_HEADER = b'Front\tBack\tTags'
+
+
+# Markdown files at least this large are decoded from a memory map
+MMAP_MIN_BYTES = 1 << 20
+
+
+def _normalize_newlines(text: str) -> str:
+    """Translate \\r\\n and \\r to \\n, as text-mode reads do."""
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def image_description_id(description: str) -> str:
+    """
+    Get a short content-addressed id for an image description.
+
+    Identical descriptions (e.g. the same figure reused across units) map
+    to the same id, so they only need to be sent to the model once.
+
+    Args:
+        description: Image description text
+
+    Returns:
+        16-character hex id
+    """
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=8).hexdigest()
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_page_count(pdf_path: str, mtime_ns: int) -> int:
+    """
+    Count a PDF's pages, cached per file version.
+
+    Args:
+        pdf_path: Path to the PDF
+        mtime_ns: File modification time, so an edited PDF is re-read
+
+    Returns:
+        Number of pages
+    """
+    return PDFProcessor.read_page_count(pdf_path)
+
+
+def _index_images_by_unit(images: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+    """Group image entries by unit in a single pass."""
+    index = {}
+    for filename, img_data in images.items():
+        description = img_data.get('description')
+        index.setdefault(img_data.get('unit'), []).append({
+            'filename': filename,
+            'page': img_data.get('page'),
+            'description': description,
+            'type': img_data.get('type'),
+            'img_id': image_description_id(description) if description else None
+        })
+    return index
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_image_descriptions(
+    metadata_path: str,
+    mtime_ns: int
+) -> Tuple[Dict[str, Dict], Dict[str, List[Dict]]]:
+    """
+    Parse image_descriptions.json and index it by unit, cached per file version.
+
+    Args:
+        metadata_path: Path to image_descriptions.json
+        mtime_ns: File modification time, so an updated file is re-read
+
+    Returns:
+        Tuple of (image filename -> metadata, unit -> image entries)
+    """
+    images = read_json(metadata_path)['images']
+    return images, _index_images_by_unit(images)
 
 
 class CardGenerationProvider(ABC):
@@ -17,6 +110,8 @@ class CardGenerationProvider(ABC):
             config: Configuration object
         """
         self.config = config
+        # Reuse previous output when an identical request was already answered
+        self.use_cache = True
 
     @abstractmethod
     def generate_flashcards(
@@ -60,7 +155,174 @@ class CardGenerationProvider(ABC):
         """
         pass
 
-    @abstractmethod
+    def _response_cache_path(self, output_dir: str, request_text: str) -> Path:
+        """
+        Get the cache file for a generation request.
+
+        Args:
+            output_dir: Output directory for .txt files
+            request_text: Exact text of the request sent to the model
+
+        Returns:
+            Path under <output_dir>/.cache keyed by a BLAKE2b hash of the request
+        """
+        key = hashlib.blake2b(request_text.encode('utf-8'), digest_size=16).hexdigest()
+        return Path(output_dir) / ".cache" / f"{key}.txt"
+
+    def _restore_cached_output(self, cache_file: Path, output_path: Path) -> bool:
+        """
+        Copy a cached response to the output path if one exists.
+
+        Returns:
+            True if the output was restored from cache, False otherwise
+        """
+        if not (self.use_cache and self.config.response_cache_enabled) or not cache_file.exists():
+            return False
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cache_file, output_path)
+        logger.info(f"Reused cached flashcards for {output_path.name}")
+        return True
+
+    def _store_cached_output(self, cache_file: Path, output_path: Path) -> None:
+        """Save a generated output file in the response cache."""
+        if not self.config.response_cache_enabled:
+            return
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Copy then rename so concurrent readers never see a partial entry
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        shutil.copyfile(output_path, tmp_file)
+        os.replace(tmp_file, cache_file)
+
+    def get_pdf_page_count(self, unit_name: str) -> int:
+        """
+        Get the page count for a unit's PDF.
+
+        Args:
+            unit_name: Unit name (e.g., 'unit_2')
+
+        Returns:
+            Number of pages in the PDF, or 0 if PDF not found
+        """
+        # Find the PDF file for this unit
+        pdf_file = self.config.get_pdf_for_unit(unit_name)
+
+        if not pdf_file:
+            logger.warning(f"No PDF found for unit: {unit_name}")
+            return 0
+
+        # Get the PDF path
+        pdf_path = Path('pdfs') / pdf_file
+
+        if not pdf_path.exists():
+            logger.warning(f"PDF file not found: {pdf_path}")
+            return 0
+
+        # Page count is cached until the PDF changes
+        try:
+            page_count = _cached_page_count(str(pdf_path), pdf_path.stat().st_mtime_ns)
+            logger.info(f"PDF {pdf_file} has {page_count} pages")
+            return page_count
+        except Exception as e:
+            logger.error(f"Failed to get page count for {pdf_file}: {e}")
+            return 0
+
+    def load_markdown(self, unit_name: str, max_chars: Optional[int] = None) -> str:
+        """
+        Load markdown content for a unit.
+
+        Args:
+            unit_name: Unit name
+            max_chars: Only return this many leading characters; the rest of
+                the file is never read from disk
+
+        Returns:
+            Markdown content
+        """
+        markdown_path = Path(self.config.markdown_dir) / f"{unit_name}.md"
+        if not markdown_path.exists():
+            raise FileNotFoundError(f"Markdown file not found: {markdown_path}")
+
+        with open(markdown_path, 'rb') as f:
+            if max_chars is not None:
+                # A UTF-8 character is at most 4 bytes, so this prefix always
+                # covers max_chars; a character cut at the end is dropped
+                raw = f.read(max_chars * 4)
+                return _normalize_newlines(raw.decode('utf-8', errors='ignore'))[:max_chars]
+
+            if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+                raw = f.read()
+                return _normalize_newlines(raw.decode('utf-8'))
+
+            # Decode straight from the mapped pages instead of first copying
+            # the whole file into a bytes object
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _normalize_newlines(str(mm, 'utf-8'))
+
+    def _read_image_descriptions(self) -> Tuple[Dict[str, Dict], Dict[str, List[Dict]]]:
+        """
+        Read all image entries from the image descriptions file.
+
+        The parsed file and its per-unit index are shared by all providers
+        and only reloaded when the file's modification time changes.
+
+        Returns:
+            Tuple of (image filename -> metadata, unit -> image entries), both
+            empty if no metadata has been generated yet
+        """
+        metadata_path = Path(self.config.metadata_dir) / "image_descriptions.json"
+
+        if not metadata_path.exists():
+            logger.warning("Image metadata not found")
+            return {}, {}
+
+        return _cached_image_descriptions(str(metadata_path), metadata_path.stat().st_mtime_ns)
+
+    def load_image_metadata(self, unit_name: str) -> List[Dict]:
+        """Load image descriptions for a unit."""
+        _, index = self._read_image_descriptions()
+        return list(index.get(unit_name, []))
+
+    def load_image_pool(self) -> Dict[str, str]:
+        """
+        Load a deduplicated pool of all image descriptions across units.
+
+        Returns:
+            Dictionary mapping description id to description text, sorted by
+            id so the rendered pool is byte-identical between units
+        """
+        pool = {}
+        images, _ = self._read_image_descriptions()
+        for img_data in images.values():
+            description = img_data.get('description')
+            if description:
+                pool[image_description_id(description)] = description
+
+        return dict(sorted(pool.items()))
+
+    def _format_quality_guidelines(self) -> str:
+        """Format card quality guidelines from config."""
+        guidelines = self.config.get_card_quality_focus()
+        return "Create cards that:\n" + "".join(
+            f"{i}. **{guideline}**\n" for i, guideline in enumerate(guidelines, 1)
+        )
+
+    def _format_example_cards(self) -> str:
+        """Format example cards from config."""
+        examples = self.config.get_example_cards()
+        if not examples:
+            return ""
+
+        return "".join(
+            f"**Example {i}:**\n```\n"
+            f"Front: {example['front']}\n"
+            f"Back: {example['back']}\n"
+            f"Tags: {example['tags']}\n"
+            "```\n\n"
+            for i, example in enumerate(examples, 1)
+        )
+
     def validate_output(self, output_path: str) -> Dict[str, Any]:
         """
         Validate generated flashcard file.
@@ -71,4 +333,43 @@ class CardGenerationProvider(ABC):
         Returns:
             Dictionary with validation results
         """
-        pass
+        results = {
+            'valid': True,
+            'errors': [],
+            'warnings': [],
+            'card_count': 0,
+            'has_headers': False
+        }
+
+        # Stream raw bytes: header and column checks never need decoded text,
+        # and only the four header lines are held at once
+        with open(output_path, 'rb') as f:
+            header_lines = list(itertools.islice(f, 4))
+
+            # Check headers
+            if len(header_lines) < 4:
+                results['valid'] = False
+                results['errors'].append("File too short - missing headers")
+                return results
+
+            for line, header in zip(header_lines, EXPECTED_HEADERS):
+                if line.strip() != header:
+                    results['errors'].append(f"Missing {header.decode()} header")
+            if not header_lines[3].startswith(COLUMN_HEADER):
+                results['errors'].append("Missing column headers")
+            else:
+                results['has_headers'] = True
+
+            # Count cards (non-blank lines) and check for common issues
+            for i, line in enumerate(f, start=5):
+                if not line.isspace():
+                    results['card_count'] += 1
+                    # Check for proper tab separation
+                    tab_count = line.count(b'\t')
+                    if tab_count != 2:
+                        results['warnings'].append(f"Line {i}: Expected 3 columns, got {tab_count + 1}")
+
+        if results['errors']:
+            results['valid'] = False
+
+        return results
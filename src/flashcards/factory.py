@@ -11,7 +11,8 @@ from typing import Optional
 
 def create_card_generator(
     config: Config = None,
-    provider: Optional[str] = None
+    provider: Optional[str] = None,
+    use_cache: bool = True
 ) -> CardGenerationProvider:
     """
     Create a card generator based on configuration.
@@ -19,6 +20,7 @@ def create_card_generator(
     Args:
         config: Configuration object (uses default if None)
         provider: Override provider ('claude' or 'ollama'), uses config if None
+        use_cache: Reuse cached output for identical requests (False forces regeneration)
 
     Returns:
         CardGenerationProvider instance
@@ -39,6 +41,8 @@ def create_card_generator(
     else:
         raise ValueError(f"Unknown provider: {provider_name}. Must be 'claude' or 'ollama'")
 
+    generator.use_cache = use_cache
+
     # Check availability
     if not generator.check_availability():
         info = generator.get_provider_info()
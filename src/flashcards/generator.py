@@ -4,8 +4,10 @@ Anki flashcard generator using Claude API.
 
 import json
 import logging
+import string
+import time
 from pathlib import Path
-from typing import List, Dict, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable, Tuple
 import anthropic
 import os
 from src.config import Config
@@ -13,6 +15,84 @@ from src.flashcards.base import CardGenerationProvider
 
 logger = logging.getLogger(__name__)
 
+# Leading characters of unit markdown included in the prompt
+MARKDOWN_PROMPT_CHARS = 20000
+
+# Anthropic clients keyed by (api_key, base_url), so generator instances
+# share one HTTP connection pool instead of each opening their own
+_CLIENT_CACHE: Dict[tuple, anthropic.Anthropic] = {}
+
+
+def _get_client(api_key: str, base_url: Optional[str] = None) -> anthropic.Anthropic:
+    """Get a shared Anthropic client for the given credentials."""
+    key = (api_key, base_url)
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        client = anthropic.Anthropic(api_key=api_key, base_url=base_url)
+        _CLIENT_CACHE[key] = client
+    return client
+
+
+# Prompt body; config-derived fields are rendered once per generator and
+# only the unit-specific fields are filled in per call
+GENERATION_PROMPT_TEMPLATE = """{subject_context}
+
+Generate approximately {target_cards} Anki flashcards from the following lecture content.
+
+# Content Source
+
+{markdown_content}
+{image_context}
+
+# Output Format Requirements
+
+Generate a tab-separated text file with these exact headers:
+```
+#separator:tab
+#html:true
+#tags column:3
+Front	Back	Tags
+```
+
+Each flashcard row should have:
+- **Front**: The question (use <br> for line breaks, not \\n)
+- **Back**: The answer with explanation (use <br> for line breaks, not \\n)
+- **Tags**: Space-separated tags (e.g., "core-topics methods")
+
+# Formatting Guidelines
+
+1. **MathJax**: Use `\\(...\\)` for inline math, `\\[...\\]` for display math
+2. **HTML**: Use `<strong>` for emphasis, `<br>` for line breaks, `<ul>` and `<li>` for lists
+3. **Images**: Reference images using `<img src="filename.png" style="max-width:500px;">`
+   - **IMPORTANT**: Place images in the FRONT (question), not the BACK (answer)
+   - The question should ask about the diagram
+   - The answer explains without repeating the image
+4. **No tabs in content**: Use spaces or `<br>` instead of tab characters
+
+# Card Quality Guidelines
+
+{quality_guidelines}
+
+# Card Type Distribution
+
+Generate approximately:
+{dist_text}
+
+# Example Cards
+
+{example_cards}
+
+# Your Task
+
+Generate exactly {target_cards} high-quality flashcards following these guidelines. Start with the required headers, then output one flashcard per line with tab-separated columns.
+
+IMPORTANT:
+- Do not include any explanatory text before or after the flashcards
+- Start directly with the headers
+- Use actual TAB characters to separate columns (not spaces)
+- Each card should be on a single line (use <br> for line breaks within fields)
+"""
+
 
 class ClaudeCardGenerator(CardGenerationProvider):
     """Generate Anki flashcards from markdown content using Claude."""
@@ -37,9 +117,12 @@ class ClaudeCardGenerator(CardGenerationProvider):
         if not self.api_key:
             raise ValueError(f"{api_key_env} not found in environment")
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = _get_client(self.api_key)
         self.model = self.config.claude_model
         self.max_tokens = self.config.claude_max_tokens
+        self.tokens_per_card = self.config.claude_tokens_per_card
+
+        self._prompt_segments = self._build_prompt_segments()
 
     def check_availability(self) -> bool:
         """Check if Claude API is available."""
@@ -53,39 +136,6 @@ class ClaudeCardGenerator(CardGenerationProvider):
             'max_tokens': str(self.max_tokens)
         }
 
-    def load_markdown(self, unit_name: str) -> str:
-        """Load markdown content for a unit."""
-        markdown_path = Path(self.config.markdown_dir) / f"{unit_name}.md"
-        if not markdown_path.exists():
-            raise FileNotFoundError(f"Markdown file not found: {markdown_path}")
-
-        with open(markdown_path, 'r', encoding='utf-8') as f:
-            return f.read()
-
-    def load_image_metadata(self, unit_name: str) -> List[Dict]:
-        """Load image descriptions for a unit."""
-        metadata_path = Path(self.config.metadata_dir) / "image_descriptions.json"
-
-        if not metadata_path.exists():
-            logger.warning("Image metadata not found")
-            return []
-
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Filter images for this unit
-        unit_images = []
-        for filename, img_data in data['images'].items():
-            if img_data.get('unit') == unit_name:
-                unit_images.append({
-                    'filename': filename,
-                    'page': img_data.get('page'),
-                    'description': img_data.get('description'),
-                    'type': img_data.get('type')
-                })
-
-        return unit_images
-
     def generate_flashcards(
         self,
         unit_name: str,
@@ -107,16 +157,15 @@ class ClaudeCardGenerator(CardGenerationProvider):
         """
         logger.info(f"Generating flashcards for {unit_name}")
 
-        # Load content
-        markdown_content = self.load_markdown(unit_name)
-        images = self.load_image_metadata(unit_name)
+        params = self._build_message_params(unit_name, target_cards)
 
-        # Create prompt for Claude
-        prompt = self._create_generation_prompt(
-            markdown_content,
-            images,
-            target_cards
-        )
+        # Skip the API call if this exact request was answered before
+        output_path = Path(output_dir) / f"{unit_name}_anki.txt"
+        cache_file = self._cache_file_for(output_dir, params)
+        if self._restore_cached_output(cache_file, output_path):
+            if progress_callback:
+                progress_callback(output_path.read_text(encoding='utf-8'))
+            return str(output_path)
 
         # Generate flashcards using Claude
         logger.info(f"Calling Claude API to generate ~{target_cards} flashcards...")
@@ -124,30 +173,166 @@ class ClaudeCardGenerator(CardGenerationProvider):
         if progress_callback:
             # Use streaming for progress feedback
             flashcard_content = ""
-            with self.client.messages.stream(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            ) as stream:
+            with self.client.messages.stream(**params) as stream:
                 for text in stream.text_stream:
                     flashcard_content += text
                     progress_callback(text)
         else:
             # Non-streaming mode
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+            response = self.client.messages.create(**params)
             flashcard_content = response.content[0].text
 
-        # Save to file
+        saved_path = self._save_flashcards(unit_name, flashcard_content, output_dir)
+        self._store_cached_output(cache_file, output_path)
+        return saved_path
+
+    def generate_flashcards_batch(
+        self,
+        target_cards_per_unit: Dict[str, int],
+        output_dir: str = "outputs",
+        poll_interval: float = 30.0
+    ) -> Dict[str, str]:
+        """
+        Generate flashcards for several units with the Message Batches API.
+
+        All units are submitted as one batch, which Anthropic processes in
+        parallel at reduced cost. This blocks until the batch has ended.
+
+        Args:
+            target_cards_per_unit: Dictionary mapping unit names to target card counts
+            output_dir: Output directory for .txt files
+            poll_interval: Seconds to wait between batch status checks
+
+        Returns:
+            Dictionary mapping unit name to path of generated .txt file.
+            Units whose request failed are omitted (and logged).
+        """
+        output_paths = {}
+        cache_files = {}
+        requests = []
+        # Unit names may contain characters (or lengths) custom_id rejects,
+        # so requests carry positional ids that map back to units
+        units_by_id = {}
+        for unit_name, target_cards in target_cards_per_unit.items():
+            try:
+                params = self._build_message_params(unit_name, target_cards)
+            except FileNotFoundError as e:
+                logger.error(f"Skipping {unit_name}: {e}")
+                continue
+
+            output_path = Path(output_dir) / f"{unit_name}_anki.txt"
+            cache_files[unit_name] = self._cache_file_for(output_dir, params)
+            if self._restore_cached_output(cache_files[unit_name], output_path):
+                output_paths[unit_name] = str(output_path)
+                continue
+
+            custom_id = f"unit-{len(requests)}"
+            units_by_id[custom_id] = unit_name
+            requests.append({"custom_id": custom_id, "params": params})
+
+        if not requests:
+            return output_paths
+
+        batch = self.client.messages.batches.create(requests=requests)
+        logger.info(f"Submitted message batch {batch.id} with {len(requests)} units")
+
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+            logger.debug(f"Batch {batch.id} status: {batch.processing_status}")
+
+        for entry in self.client.messages.batches.results(batch.id):
+            unit_name = units_by_id[entry.custom_id]
+            if entry.result.type != "succeeded":
+                logger.error(f"Batch request for {unit_name} {entry.result.type}")
+                continue
+
+            flashcard_content = entry.result.message.content[0].text
+            output_paths[unit_name] = self._save_flashcards(unit_name, flashcard_content, output_dir)
+            self._store_cached_output(cache_files[unit_name], Path(output_paths[unit_name]))
+
+        return output_paths
+
+    def _cache_file_for(self, output_dir: str, params: Dict[str, Any]) -> Path:
+        """Get the response cache file for a Claude request."""
+        request_text = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        return self._response_cache_path(output_dir, request_text)
+
+    def _build_message_params(self, unit_name: str, target_cards: int) -> Dict[str, Any]:
+        """
+        Build the Messages API request for a unit.
+
+        The same payload is used for streaming, non-streaming and batch
+        requests, so cache_control annotations live in one place.
+
+        Args:
+            unit_name: Unit name
+            target_cards: Target number of flashcards to generate
+
+        Returns:
+            Keyword arguments for messages.create / messages.stream
+        """
+        return {
+            "model": self.model,
+            "max_tokens": self._max_tokens_for(target_cards),
+            "messages": [{
+                "role": "user",
+                "content": self._build_message_content(unit_name, target_cards)
+            }]
+        }
+
+    def _max_tokens_for(self, target_cards: int) -> int:
+        """
+        Size the output token budget to the unit's card target.
+
+        Args:
+            target_cards: Target number of flashcards to generate
+
+        Returns:
+            Estimated tokens for the cards plus headroom, capped at the
+            configured max_tokens
+        """
+        return min(self.max_tokens, target_cards * self.tokens_per_card + 500)
+
+    def _build_message_content(self, unit_name: str, target_cards: int):
+        """
+        Build the user message content for a unit.
+
+        Args:
+            unit_name: Unit name
+            target_cards: Target number of flashcards to generate
+
+        Returns:
+            Prompt string, or list of content blocks when an image pool exists
+        """
+        # Load content
+        markdown_content = self.load_markdown(unit_name, max_chars=MARKDOWN_PROMPT_CHARS)
+        images = self.load_image_metadata(unit_name)
+        image_pool = self.load_image_pool()
+
+        # Create prompt for Claude
+        prompt = self._create_generation_prompt(
+            markdown_content,
+            images,
+            target_cards
+        )
+
+        # The image pool is shared by every unit, so send it as a separate
+        # cacheable block ahead of the unit-specific prompt
+        if not image_pool:
+            return prompt
+
+        return [
+            {
+                "type": "text",
+                "text": self._format_image_pool(image_pool),
+                "cache_control": {"type": "ephemeral"}
+            },
+            {"type": "text", "text": prompt}
+        ]
+
+    def _save_flashcards(self, unit_name: str, flashcard_content: str, output_dir: str) -> str:
+        """Write generated flashcards for a unit and return the output path."""
         output_path = Path(output_dir) / f"{unit_name}_anki.txt"
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -157,50 +342,22 @@ class ClaudeCardGenerator(CardGenerationProvider):
         logger.info(f"Saved flashcards to {output_path}")
         return str(output_path)
 
-    def _format_quality_guidelines(self) -> str:
-        """Format card quality guidelines from config."""
-        guidelines = self.config.get_card_quality_focus()
-        formatted = "Create cards that:\n"
-        for i, guideline in enumerate(guidelines, 1):
-            formatted += f"{i}. **{guideline}**\n"
-        return formatted
-
-    def _format_example_cards(self) -> str:
-        """Format example cards from config."""
-        examples = self.config.get_example_cards()
-        if not examples:
-            return ""
-
-        formatted = ""
-        for i, example in enumerate(examples, 1):
-            formatted += f"**Example {i}:**\n```\n"
-            formatted += f"Front: {example['front']}\n"
-            formatted += f"Back: {example['back']}\n"
-            formatted += f"Tags: {example['tags']}\n"
-            formatted += "```\n\n"
-        return formatted
-
-    def _create_generation_prompt(
-        self,
-        markdown_content: str,
-        images: List[Dict],
-        target_cards: int
-    ) -> str:
-        """Create prompt for Claude to generate flashcards."""
-
+    def _format_image_pool(self, image_pool: Dict[str, str]) -> str:
+        """Format the shared image description pool referenced by unit prompts."""
+        parts = [
+            "# Image Description Pool\n\n",
+            "Descriptions of lecture images, referenced by id in the content that follows.\n\n"
+        ]
+        parts.extend(f"- [{img_id}] {description}\n" for img_id, description in image_pool.items())
+        return "".join(parts)
+
+    def _build_prompt_fields(self) -> Dict[str, str]:
+        """Render the config-derived prompt fields, which are constant per run."""
         # Get subject context from config
         subject_context = self.config.get_prompt_template('system_context')
         if not subject_context:
             subject_context = "You are generating educational flashcards from lecture materials."
 
-        # Format image info
-        image_context = ""
-        if images:
-            image_context = "\n\n## Available Images\n\n"
-            for img in images:
-                image_context += f"- **{img['filename']}** (Page {img['page']}, Type: {img['type']})\n"
-                image_context += f"  Description: {img['description']}\n\n"
-
         # Get card distribution from config
         distribution = self.config.card_distribution
         dist_text = f"""- {int(distribution['conceptual']*100)}% Conceptual Understanding (Why does X work? What's the intuition?)
@@ -209,119 +366,65 @@ class ClaudeCardGenerator(CardGenerationProvider):
 - {int(distribution['pattern_recognition']*100)}% Pattern Recognition (Identify reasoning patterns, independence structures)
 - {int(distribution['visual']*100)}% Visual/Diagram-Based (with images in the question)"""
 
-        prompt = f"""{subject_context}
-
-Generate approximately {target_cards} Anki flashcards from the following lecture content.
-
-# Content Source
-
-{markdown_content[:20000]}
-{image_context}
-
-# Output Format Requirements
-
-Generate a tab-separated text file with these exact headers:
-```
-#separator:tab
-#html:true
-#tags column:3
-Front	Back	Tags
-```
-
-Each flashcard row should have:
-- **Front**: The question (use <br> for line breaks, not \\n)
-- **Back**: The answer with explanation (use <br> for line breaks, not \\n)
-- **Tags**: Space-separated tags (e.g., "core-topics methods")
-
-# Formatting Guidelines
-
-1. **MathJax**: Use `\\(...\\)` for inline math, `\\[...\\]` for display math
-2. **HTML**: Use `<strong>` for emphasis, `<br>` for line breaks, `<ul>` and `<li>` for lists
-3. **Images**: Reference images using `<img src="filename.png" style="max-width:500px;">`
-   - **IMPORTANT**: Place images in the FRONT (question), not the BACK (answer)
-   - The question should ask about the diagram
-   - The answer explains without repeating the image
-4. **No tabs in content**: Use spaces or `<br>` instead of tab characters
-
-# Card Quality Guidelines
-
-{self._format_quality_guidelines()}
-
-# Card Type Distribution
-
-Generate approximately:
-{dist_text}
-
-# Example Cards
-
-{self._format_example_cards()}
-
-# Your Task
-
-Generate exactly {target_cards} high-quality flashcards following these guidelines. Start with the required headers, then output one flashcard per line with tab-separated columns.
-
-IMPORTANT:
-- Do not include any explanatory text before or after the flashcards
-- Start directly with the headers
-- Use actual TAB characters to separate columns (not spaces)
-- Each card should be on a single line (use <br> for line breaks within fields)
-"""
-
-        return prompt
+        return {
+            'subject_context': subject_context,
+            'quality_guidelines': self._format_quality_guidelines(),
+            'dist_text': dist_text,
+            'example_cards': self._format_example_cards()
+        }
 
-    def validate_output(self, output_path: str) -> Dict[str, any]:
+    def _build_prompt_segments(self) -> List[Tuple[str, Optional[str]]]:
         """
-        Validate generated flashcard file.
-
-        Args:
-            output_path: Path to generated .txt file
+        Pre-render the prompt template with its config-derived fields.
 
         Returns:
-            Dictionary with validation results
+            List of (static text, unit-specific field name or None) pairs;
+            a prompt is the static text of each pair followed by its field
         """
-        with open(output_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        results = {
-            'valid': True,
-            'errors': [],
-            'warnings': [],
-            'card_count': 0,
-            'has_headers': False
-        }
+        fields = self._build_prompt_fields()
+        segments = []
+        text = ""
+        for literal, field_name, _, _ in string.Formatter().parse(GENERATION_PROMPT_TEMPLATE):
+            text += literal
+            if field_name is None:
+                continue
+            if field_name in fields:
+                text += fields[field_name]
+            else:
+                segments.append((text, field_name))
+                text = ""
+        segments.append((text, None))
+        return segments
 
-        # Check headers
-        if len(lines) < 4:
-            results['valid'] = False
-            results['errors'].append("File too short - missing headers")
-            return results
-
-        if lines[0].strip() != '#separator:tab':
-            results['errors'].append("Missing #separator:tab header")
-        if lines[1].strip() != '#html:true':
-            results['errors'].append("Missing #html:true header")
-        if lines[2].strip() != '#tags column:3':
-            results['errors'].append("Missing #tags column:3 header")
-        if not lines[3].startswith('Front\tBack\tTags'):
-            results['errors'].append("Missing column headers")
-        else:
-            results['has_headers'] = True
-
-        # Count cards (skip header lines)
-        results['card_count'] = len(lines) - 4
-
-        # Check for common issues
-        for i, line in enumerate(lines[4:], start=5):
-            if line.strip():
-                # Check for proper tab separation
-                parts = line.split('\t')
-                if len(parts) != 3:
-                    results['warnings'].append(f"Line {i}: Expected 3 columns, got {len(parts)}")
-
-        if results['errors']:
-            results['valid'] = False
+    def _create_generation_prompt(
+        self,
+        markdown_content: str,
+        images: List[Dict],
+        target_cards: int
+    ) -> str:
+        """Create prompt for Claude to generate flashcards."""
 
-        return results
+        # Format image info (descriptions are referenced by id from the image pool)
+        image_context = ""
+        if images:
+            parts = ["\n\n## Available Images\n\n"]
+            for img in images:
+                parts.append(f"- **{img['filename']}** (Page {img['page']}, Type: {img['type']})\n")
+                if img['img_id']:
+                    parts.append(f"  Description: see [{img['img_id']}] in the image description pool\n\n")
+                else:
+                    parts.append("  Description: None\n\n")
+            image_context = "".join(parts)
+
+        values = {
+            'markdown_content': markdown_content[:MARKDOWN_PROMPT_CHARS],
+            'image_context': image_context,
+            'target_cards': str(target_cards)
+        }
+        return "".join(
+            text + values[field_name] if field_name else text
+            for text, field_name in self._prompt_segments
+        )
 
 
 def generate_all_units(target_cards_per_unit: Dict[str, int] = None, config: Config = None):
@@ -350,24 +453,30 @@ def generate_all_units(target_cards_per_unit: Dict[str, int] = None, config: Con
 
     generator = ClaudeCardGenerator(config=config)
 
-    for unit_name, target_cards in target_cards_per_unit.items():
-        try:
-            output_path = generator.generate_flashcards(unit_name, target_cards)
-
-            # Validate
-            validation = generator.validate_output(output_path)
-
-            print(f"\n{unit_name}:")
-            print(f"  Generated: {output_path}")
-            print(f"  Cards: {validation['card_count']}")
-            print(f"  Valid: {validation['valid']}")
-
-            if validation['warnings']:
-                print(f"  Warnings: {len(validation['warnings'])}")
-
-        except Exception as e:
-            logger.error(f"Failed to generate flashcards for {unit_name}: {e}")
-            print(f"\n{unit_name}: FAILED - {e}")
+    # Units are independent, so submit them all as a single message batch
+    try:
+        output_paths = generator.generate_flashcards_batch(target_cards_per_unit)
+    except Exception as e:
+        logger.error(f"Failed to generate flashcard batch: {e}")
+        print(f"\nBatch generation FAILED - {e}")
+        return
+
+    for unit_name in target_cards_per_unit:
+        output_path = output_paths.get(unit_name)
+        if output_path is None:
+            print(f"\n{unit_name}: FAILED - no result in batch")
+            continue
+
+        # Validate
+        validation = generator.validate_output(output_path)
+
+        print(f"\n{unit_name}:")
+        print(f"  Generated: {output_path}")
+        print(f"  Cards: {validation['card_count']}")
+        print(f"  Valid: {validation['valid']}")
+
+        if validation['warnings']:
+            print(f"  Warnings: {len(validation['warnings'])}")
 
 
 # Backward compatibility alias
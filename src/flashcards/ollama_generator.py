@@ -2,18 +2,126 @@
 Anki flashcard generator using Ollama.
 """
 
-import json
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, TextIO, Tuple
 from src.config import Config
 from src.flashcards.base import CardGenerationProvider
 from src.ollama.client import OllamaClient
-from src.pdf_processor import PDFProcessor
 
 logger = logging.getLogger(__name__)
 
 
+# Instructions shared by every unit; rendered once per generator so the
+# prompt prefix stays byte-identical and Ollama can reuse its KV cache
+STATIC_PROMPT_TEMPLATE = """{subject_context}
+
+Your task is to generate Anki flashcards from the lecture content given at the end of this prompt.
+
+# CRITICAL OUTPUT FORMAT REQUIREMENTS
+
+You MUST output ONLY the flashcard data in this exact format:
+
+First, these header lines:
+#separator:tab
+#html:true
+#tags column:3
+Front	Back	Tags
+
+Then each flashcard as a single line with THREE tab-separated columns:
+Front[TAB]Back[TAB]Tags
+
+IMPORTANT FORMATTING RULES:
+- Use actual TAB characters to separate columns (not spaces)
+- Use <br> for line breaks within fields (not \\n)
+- Use <strong> for bold text
+- Use \\(...\\) for inline math, \\[...\\] for display math
+- Place images in Front using: <img src="filename.png" style="max-width:500px;">
+- Tags should be space-separated words
+- Each card must be on a SINGLE line
+- NO explanatory text before or after the flashcards
+- Start directly with the headers
+
+# Card Quality Guidelines
+
+{quality_guidelines}
+
+# Card Type Distribution
+
+Generate approximately:
+{dist_text}
+
+# Example Cards Format
+
+{example_cards}
+"""
+
+# num_ctx sent to Ollama is rounded up to a multiple of this many tokens
+NUM_CTX_STEP = 2048
+
+
+# Unit-specific part of the prompt, appended after the static prefix
+DYNAMIC_PROMPT_TEMPLATE = """
+# Lecture Content
+
+{markdown_content}
+{image_context}
+
+# Your Task
+
+Generate exactly {target_cards} flashcards from the lecture content above, following the format above.
+
+OUTPUT ONLY:
+1. The four header lines
+2. {target_cards} flashcard lines (Front[TAB]Back[TAB]Tags)
+
+Nothing else. No introductions, no explanations, no markdown formatting around the output.
+"""
+
+
+def _has_two_tabs(text: str, start: int = 0, end: Optional[int] = None) -> bool:
+    """Check for at least two tabs in text[start:end], stopping at the second one."""
+    if end is None:
+        end = len(text)
+    first = text.find('\t', start, end)
+    return first != -1 and text.find('\t', first + 1, end) != -1
+
+
+def _is_card_line(line: str) -> bool:
+    """Check whether an output line looks like a flashcard (three tab-separated columns)."""
+    return _has_two_tabs(line) and bool(line.strip())
+
+
+class _CardLineCounter:
+    """Count flashcard lines in streamed output without re-scanning earlier text."""
+
+    def __init__(self, sink: Optional[TextIO] = None):
+        """
+        Initialize counter.
+
+        Args:
+            sink: Optional file every chunk is written to as it arrives
+        """
+        self.card_count = 0
+        self.received = False
+        self._sink = sink
+        # Text after the last newline; the only part a new chunk can extend
+        self._tail = ""
+
+    def feed(self, chunk: str) -> None:
+        """Record a chunk and count the lines it completes."""
+        self.received = True
+        if self._sink is not None:
+            self._sink.write(chunk)
+        *completed, self._tail = (self._tail + chunk).split('\n')
+        self.card_count += sum(1 for line in completed if _is_card_line(line))
+
+    def total_cards(self) -> int:
+        """Count cards received so far, including an unterminated last line."""
+        return self.card_count + (1 if _is_card_line(self._tail) else 0)
+
+
 class OllamaCardGenerator(CardGenerationProvider):
     """Generate Anki flashcards from markdown content using Ollama."""
 
@@ -33,10 +141,29 @@ class OllamaCardGenerator(CardGenerationProvider):
             base_url=self.config.ollama_generation_base_url,
             model=self.config.ollama_generation_model,
             timeout=self.config.ollama_generation_timeout,
-            max_retries=self.config.ollama_generation_max_retries
+            max_retries=self.config.ollama_generation_max_retries,
+            compress_requests=self.config.ollama_generation_compress_requests,
+            tokenizer=self.config.ollama_generation_tokenizer
         )
 
         self.temperature = self.config.ollama_generation_temperature
+        self.num_ctx = self.config.ollama_generation_num_ctx
+        self.keep_alive = self.config.ollama_generation_keep_alive
+        self.early_stop = self.config.ollama_generation_early_stop
+
+        self._static_prompt_prefix = self._build_static_prompt_prefix()
+
+    def close(self) -> None:
+        """Close the Ollama client's pooled connections."""
+        self.client.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
 
     def check_availability(self) -> bool:
         """Check if Ollama is available."""
@@ -50,123 +177,22 @@ class OllamaCardGenerator(CardGenerationProvider):
             'base_url': self.client.base_url
         }
 
-    def load_markdown(self, unit_name: str) -> str:
-        """Load markdown content for a unit."""
-        markdown_path = Path(self.config.markdown_dir) / f"{unit_name}.md"
-        if not markdown_path.exists():
-            raise FileNotFoundError(f"Markdown file not found: {markdown_path}")
-
-        with open(markdown_path, 'r', encoding='utf-8') as f:
-            return f.read()
-
-    def load_image_metadata(self, unit_name: str) -> List[Dict]:
-        """Load image descriptions for a unit."""
-        metadata_path = Path(self.config.metadata_dir) / "image_descriptions.json"
-
-        if not metadata_path.exists():
-            logger.warning("Image metadata not found")
-            return []
-
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Filter images for this unit
-        unit_images = []
-        for filename, img_data in data['images'].items():
-            if img_data.get('unit') == unit_name:
-                unit_images.append({
-                    'filename': filename,
-                    'page': img_data.get('page'),
-                    'description': img_data.get('description'),
-                    'type': img_data.get('type')
-                })
-
-        return unit_images
-
-    def get_pdf_page_count(self, unit_name: str) -> int:
+    def _build_static_prompt_prefix(self) -> str:
         """
-        Get the page count for a unit's PDF.
+        Build the part of the generation prompt that never changes between units.
 
-        Args:
-            unit_name: Unit name (e.g., 'unit_2')
+        Keeping this text byte-identical and at the start of every prompt lets
+        Ollama reuse the KV cache for it instead of re-running prefill.
 
         Returns:
-            Number of pages in the PDF, or 0 if PDF not found
+            Static instructions (subject context, format rules, guidelines,
+            distribution and examples)
         """
-        # Find the PDF file for this unit
-        units = self.config.get_all_units()
-        pdf_file = None
-
-        for pdf_filename, unit_info in units.items():
-            if unit_info.get('unit_name') == unit_name:
-                pdf_file = pdf_filename
-                break
-
-        if not pdf_file:
-            logger.warning(f"No PDF found for unit: {unit_name}")
-            return 0
-
-        # Get the PDF path
-        pdf_path = Path('pdfs') / pdf_file
-
-        if not pdf_path.exists():
-            logger.warning(f"PDF file not found: {pdf_path}")
-            return 0
-
-        # Get page count using PDFProcessor
-        try:
-            with PDFProcessor(str(pdf_path), unit_name) as processor:
-                page_count = processor.get_page_count()
-                logger.info(f"PDF {pdf_file} has {page_count} pages")
-                return page_count
-        except Exception as e:
-            logger.error(f"Failed to get page count for {pdf_file}: {e}")
-            return 0
-
-    def _format_quality_guidelines(self) -> str:
-        """Format card quality guidelines from config."""
-        guidelines = self.config.get_card_quality_focus()
-        formatted = "Create cards that:\n"
-        for i, guideline in enumerate(guidelines, 1):
-            formatted += f"{i}. **{guideline}**\n"
-        return formatted
-
-    def _format_example_cards(self) -> str:
-        """Format example cards from config."""
-        examples = self.config.get_example_cards()
-        if not examples:
-            return ""
-
-        formatted = ""
-        for i, example in enumerate(examples, 1):
-            formatted += f"**Example {i}:**\n```\n"
-            formatted += f"Front: {example['front']}\n"
-            formatted += f"Back: {example['back']}\n"
-            formatted += f"Tags: {example['tags']}\n"
-            formatted += "```\n\n"
-        return formatted
-
-    def _create_generation_prompt(
-        self,
-        markdown_content: str,
-        images: List[Dict],
-        target_cards: int
-    ) -> str:
-        """Create prompt for Ollama to generate flashcards."""
-
         # Get subject context from config
         subject_context = self.config.get_prompt_template('system_context')
         if not subject_context:
             subject_context = "You are generating educational flashcards."
 
-        # Format image info
-        image_context = ""
-        if images:
-            image_context = "\n\n## Available Images\n\n"
-            for img in images:
-                image_context += f"- **{img['filename']}** (Page {img['page']}, Type: {img['type']})\n"
-                image_context += f"  Description: {img['description']}\n\n"
-
         # Get card distribution from config
         distribution = self.config.card_distribution
         dist_text = f"""- {int(distribution['conceptual']*100)}% Conceptual Understanding
@@ -175,63 +201,124 @@ class OllamaCardGenerator(CardGenerationProvider):
 - {int(distribution['pattern_recognition']*100)}% Pattern Recognition
 - {int(distribution['visual']*100)}% Visual/Diagram-Based"""
 
-        prompt = f"""{subject_context}
-
-Your task is to generate exactly {target_cards} Anki flashcards from the lecture content below.
+        return STATIC_PROMPT_TEMPLATE.format_map({
+            'subject_context': subject_context,
+            'quality_guidelines': self._format_quality_guidelines(),
+            'dist_text': dist_text,
+            'example_cards': self._format_example_cards()
+        })
 
-# Lecture Content
-
-{markdown_content[:15000]}
-{image_context}
-
-# CRITICAL OUTPUT FORMAT REQUIREMENTS
+    def _create_generation_prompt(
+        self,
+        markdown_content: str,
+        images: List[Dict],
+        target_cards: int
+    ) -> str:
+        """Create prompt for Ollama to generate flashcards."""
 
-You MUST output ONLY the flashcard data in this exact format:
+        # Format image info
+        image_context = ""
+        if images:
+            parts = ["\n\n## Available Images\n\n"]
+            parts.extend(
+                f"- **{img['filename']}** (Page {img['page']}, Type: {img['type']})\n"
+                f"  Description: {img['description']}\n\n"
+                for img in images
+            )
+            image_context = "".join(parts)
+
+        # Unit-specific content goes strictly after the static prefix
+        return self._static_prompt_prefix + DYNAMIC_PROMPT_TEMPLATE.format_map({
+            'markdown_content': markdown_content,
+            'image_context': image_context,
+            'target_cards': target_cards
+        })
+
+    @staticmethod
+    def _output_token_budget(target_cards: int) -> int:
+        """Estimate output tokens for a card target."""
+        # ~100 tokens per card (front + back + tags + formatting)
+        # Add 20% buffer for safety
+        return int(target_cards * 100 * 1.2)
 
-First, these header lines:
-#separator:tab
-#html:true
-#tags column:3
-Front	Back	Tags
+    def _request_num_ctx(self, prompt: str, effective_target: int) -> int:
+        """
+        Size the context window for one generation request.
 
-Then each flashcard as a single line with THREE tab-separated columns:
-Front[TAB]Back[TAB]Tags
+        Ollama only allocates the num_ctx it is sent, not the model's maximum,
+        and silently drops the start of longer prompts (the format
+        instructions). The window is therefore grown to fit the prompt plus
+        the output budget, rounded up to a multiple of NUM_CTX_STEP so similar
+        units share a size and don't force a model reload, and capped at the
+        model's maximum.
 
-IMPORTANT FORMATTING RULES:
-- Use actual TAB characters to separate columns (not spaces)
-- Use <br> for line breaks within fields (not \\n)
-- Use <strong> for bold text
-- Use \\(...\\) for inline math, \\[...\\] for display math
-- Place images in Front using: <img src="filename.png" style="max-width:500px;">
-- Tags should be space-separated words
-- Each card must be on a SINGLE line
-- NO explanatory text before or after the flashcards
-- Start directly with the headers
+        Args:
+            prompt: Full generation prompt
+            effective_target: Number of cards requested
 
-# Card Quality Guidelines
+        Returns:
+            num_ctx in tokens (at least generation.ollama.num_ctx)
+        """
+        needed = self.client.estimate_tokens(prompt) + self._output_token_budget(effective_target)
+        # Headroom for estimation error
+        needed = int(needed * 1.1)
+        num_ctx = max(self.num_ctx, -(-needed // NUM_CTX_STEP) * NUM_CTX_STEP)
+        return min(num_ctx, self.client.get_context_length())
 
-{self._format_quality_guidelines()}
+    def _generation_options(self, effective_target: int, num_ctx: int) -> Dict[str, Any]:
+        """
+        Get Ollama options that bound generation on the server.
 
-# Card Type Distribution
+        num_ctx sets the context window allocated for the request,
+        num_predict caps decoding at the output budget and the stop sequence
+        ends it once the model starts emitting blank lines after the cards.
+        The client-side stop condition still applies on top of these.
+        """
+        return {
+            "num_ctx": num_ctx,
+            "num_predict": self._output_token_budget(effective_target),
+            "stop": ["\n\n\n"]
+        }
 
-Generate approximately:
-{dist_text}
+    def _estimate_token_budget(
+        self,
+        markdown_content: str,
+        target_cards: int,
+        images: List[Dict]
+    ) -> Dict[str, int]:
+        """
+        Estimate how the model's context window is split for a unit.
 
-# Example Cards Format
+        Args:
+            markdown_content: Full markdown content
+            target_cards: Target number of cards to generate
+            images: Image metadata list
 
-{self._format_example_cards()}
+        Returns:
+            Dictionary with context_length, prompt_overhead, image_tokens,
+            output_tokens, available_for_content and content_tokens
+        """
+        # Get model's context length
+        context_length = self.client.get_context_length()
 
-# Your Task
+        # Prompt template overhead (without content): ~2000 tokens
+        prompt_overhead = 2000
 
-Generate exactly {target_cards} flashcards following the format above.
+        # Image descriptions: ~50 tokens each
+        image_tokens = len(images) * 50
 
-OUTPUT ONLY:
-1. The four header lines
-2. {target_cards} flashcard lines (Front[TAB]Back[TAB]Tags)
+        output_tokens = self._output_token_budget(target_cards)
 
-Nothing else. No introductions, no explanations, no markdown formatting around the output.
-"""
-        return prompt
+        return {
+            'context_length': context_length,
+            'prompt_overhead': prompt_overhead,
+            'image_tokens': image_tokens,
+            'output_tokens': output_tokens,
+            # Available tokens for markdown content
+            'available_for_content': context_length - prompt_overhead - image_tokens - output_tokens,
+            # Estimate current content tokens
+            'content_tokens': self.client.estimate_tokens(markdown_content)
+        }
 
     def _check_and_truncate_for_context(
         self,
@@ -252,28 +339,20 @@ Nothing else. No introductions, no explanations, no markdown formatting around t
 
         Returns:
             Possibly truncated markdown content
+
+        Raises:
+            ValueError: If the prompt template, images and output budget
+                leave no room for any content
         """
-        # Get model's context length
-        context_length = self.client.get_context_length()
+        budget = self._estimate_token_budget(markdown_content, target_cards, images)
+        context_length = budget['context_length']
+        prompt_overhead = budget['prompt_overhead']
+        image_tokens = budget['image_tokens']
+        output_tokens = budget['output_tokens']
+        available_for_content = budget['available_for_content']
+        content_tokens = budget['content_tokens']
         logger.info(f"Model context length: {context_length} tokens")
 
-        # Estimate token budgets
-        # Prompt template overhead (without content): ~2000 tokens
-        prompt_overhead = 2000
-
-        # Image descriptions: ~50 tokens each
-        image_tokens = len(images) * 50
-
-        # Output estimate: ~100 tokens per card (front + back + tags + formatting)
-        # Add 20% buffer for safety
-        output_tokens = int(target_cards * 100 * 1.2)
-
-        # Available tokens for markdown content
-        available_for_content = context_length - prompt_overhead - image_tokens - output_tokens
-
-        # Estimate current content tokens
-        content_tokens = self.client.estimate_tokens(markdown_content)
-
         logger.info(
             f"Token budget: context={context_length}, "
             f"overhead={prompt_overhead}, images={image_tokens}, "
@@ -286,11 +365,22 @@ Nothing else. No introductions, no explanations, no markdown formatting around t
             logger.info("Content fits within context window")
             return markdown_content
 
+        if available_for_content <= 0:
+            logger.error(
+                f"No room for content: output reserve ({output_tokens}) and overhead "
+                f"({prompt_overhead + image_tokens}) fill the {context_length}-token context"
+            )
+            raise ValueError(
+                f"Card target needs more than the model's {context_length}-token context; "
+                f"lower the target or use a model with a larger context"
+            )
+
         # Need to truncate
         # Calculate what percentage of content we can keep
         keep_ratio = available_for_content / content_tokens
-        # Add safety margin
-        keep_ratio = max(0.5, keep_ratio * 0.9)  # Keep at least 50%
+        # Add safety margin; no floor, since anything past the context window
+        # is cut from the front of the prompt (the format instructions)
+        keep_ratio = keep_ratio * 0.9
 
         target_chars = int(len(markdown_content) * keep_ratio)
 
@@ -335,6 +425,185 @@ Nothing else. No introductions, no explanations, no markdown formatting around t
         """
         logger.info(f"Generating flashcards for {unit_name} using Ollama")
 
+        prompt, effective_target, options, output_path, cache_file = self._prepare_generation(
+            unit_name, target_cards, output_dir
+        )
+
+        # Skip generation if this exact prompt was answered before
+        if self._restore_cached_output(cache_file, output_path):
+            if progress_callback:
+                progress_callback(output_path.read_text(encoding='utf-8'))
+            return str(output_path)
+
+        # Generate using Ollama
+        logger.info(f"Calling Ollama ({self.client.model}) to generate ~{effective_target} flashcards...")
+
+        # Use streaming for early stopping capability
+        use_streaming = True
+
+        flashcard_content = None
+        interrupted = False
+
+        # Chunks go to disk as they arrive rather than into a second
+        # in-memory copy, so an interrupted run can still be saved
+        partial_path = output_path.with_name(f"{output_path.name}.partial")
+        try:
+            with open(partial_path, 'w', encoding='utf-8', newline='') as partial_file:
+                counter, counting_callback, should_stop = self._make_stream_callbacks(
+                    effective_target, progress_callback, partial_file
+                )
+
+                try:
+                    flashcard_content = self.client.generate_text(
+                        prompt=prompt,
+                        temperature=self.temperature,
+                        stream=use_streaming,
+                        keep_alive=self.keep_alive,
+                        options=options,
+                        progress_callback=counting_callback if use_streaming else None,
+                        stop_condition=should_stop
+                    )
+                except KeyboardInterrupt:
+                    interrupted = True
+                    logger.info("Generation interrupted by user")
+
+                    if not counter.received:
+                        logger.warning("No content generated before interruption")
+                        raise
+                    logger.info(f"Saving {counter.total_cards()} partially generated cards...")
+
+            if interrupted:
+                with open(partial_path, encoding='utf-8', newline='') as partial_file:
+                    flashcard_content = partial_file.read()
+        finally:
+            partial_path.unlink(missing_ok=True)
+
+        return self._save_generation(
+            flashcard_content, effective_target, output_path, cache_file, interrupted
+        )
+
+    async def agenerate_flashcards(
+        self,
+        unit_name: str,
+        target_cards: int = 60,
+        output_dir: str = "outputs",
+        progress_callback: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Generate Anki flashcards for a unit without blocking the event loop.
+
+        Same behaviour as generate_flashcards, but the Ollama request is made
+        with the async client so several units can be in flight at once.
+
+        Args:
+            unit_name: Unit name (e.g., 'unit3_core_topics')
+            target_cards: Target number of flashcards to generate
+            output_dir: Output directory for .txt file
+            progress_callback: Optional callback function(chunk: str) for progress updates
+
+        Returns:
+            Path to generated .txt file
+        """
+        logger.info(f"Generating flashcards for {unit_name} using Ollama (async)")
+
+        # Loading files, counting PDF pages and the context check are blocking
+        loop = asyncio.get_running_loop()
+        prompt, effective_target, options, output_path, cache_file = await loop.run_in_executor(
+            None, self._prepare_generation, unit_name, target_cards, output_dir
+        )
+
+        if self._restore_cached_output(cache_file, output_path):
+            if progress_callback:
+                progress_callback(output_path.read_text(encoding='utf-8'))
+            return str(output_path)
+
+        _, counting_callback, should_stop = self._make_stream_callbacks(
+            effective_target, progress_callback
+        )
+
+        flashcard_content = await self.client.agenerate_text(
+            prompt=prompt,
+            temperature=self.temperature,
+            stream=True,
+            keep_alive=self.keep_alive,
+            options=options,
+            progress_callback=counting_callback,
+            stop_condition=should_stop
+        )
+
+        # Truncating and writing the file is blocking work as well
+        return await loop.run_in_executor(
+            None, self._save_generation,
+            flashcard_content, effective_target, output_path, cache_file
+        )
+
+    async def generate_many(
+        self,
+        target_cards_per_unit: Dict[str, int],
+        output_dir: str = "outputs",
+        concurrency: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Generate flashcards for several units concurrently.
+
+        Ollama only processes requests in parallel when the server is started
+        with OLLAMA_NUM_PARALLEL >= concurrency; otherwise requests queue on
+        the server and only network round-trips overlap.
+
+        Args:
+            target_cards_per_unit: Dictionary mapping unit names to target card counts
+            output_dir: Output directory for .txt files
+            concurrency: Maximum number of units generated at the same time
+                (defaults to generation.ollama.max_parallel)
+
+        Returns:
+            Dictionary mapping unit name to path of generated .txt file.
+            Units that failed are omitted (and logged).
+        """
+        if concurrency is None:
+            concurrency = self.config.ollama_generation_max_parallel
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def generate_unit(unit_name: str, target_cards: int) -> str:
+            async with semaphore:
+                return await self.agenerate_flashcards(unit_name, target_cards, output_dir)
+
+        try:
+            results = await asyncio.gather(
+                *(generate_unit(unit, target) for unit, target in target_cards_per_unit.items()),
+                return_exceptions=True
+            )
+        finally:
+            # The async client is bound to this event loop
+            await self.client.aclose()
+
+        output_paths = {}
+        for unit_name, result in zip(target_cards_per_unit, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to generate flashcards for {unit_name}: {result}")
+            else:
+                output_paths[unit_name] = result
+
+        return output_paths
+
+    def _prepare_generation(
+        self,
+        unit_name: str,
+        target_cards: int,
+        output_dir: str
+    ) -> Tuple[str, int, Dict[str, Any], Path, Path]:
+        """
+        Load a unit's content and build its generation prompt.
+
+        Args:
+            unit_name: Unit name
+            target_cards: Configured target number of cards
+            output_dir: Output directory for .txt file
+
+        Returns:
+            Tuple of (prompt, effective card target, Ollama options, output
+            path, cache file)
+        """
         # Load content
         markdown_content = self.load_markdown(unit_name)
         images = self.load_image_metadata(unit_name)
@@ -368,176 +637,158 @@ Nothing else. No introductions, no explanations, no markdown formatting around t
             effective_target
         )
 
-        # Generate using Ollama
-        logger.info(f"Calling Ollama ({self.client.model}) to generate ~{effective_target} flashcards...")
+        options = self._generation_options(
+            effective_target, self._request_num_ctx(prompt, effective_target)
+        )
+
+        # Prepare output path
+        output_path = Path(output_dir) / f"{unit_name}_anki.txt"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Key on everything that shapes the output, not just the prompt
+        cache_key = f"{self.client.model}\n{self.temperature}\n{options}\n{prompt}"
+        cache_file = self._response_cache_path(output_dir, cache_key)
+        return prompt, effective_target, options, output_path, cache_file
 
-        # Create a wrapper callback that stops generation when target is reached
-        accumulated_content = []
-        card_count = [0]  # Use list to allow modification in nested function
+    def _make_stream_callbacks(
+        self,
+        effective_target: int,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        sink: Optional[TextIO] = None
+    ) -> Tuple[_CardLineCounter, Callable[[str], None], Optional[Callable[[str], bool]]]:
+        """
+        Create the streaming callbacks that count cards and stop generation early.
+
+        Args:
+            effective_target: Number of cards wanted
+            progress_callback: Optional callback forwarded each chunk
+            sink: Optional file each chunk is written to as it arrives
+
+        Returns:
+            Tuple of (stream counter, chunk callback, stop condition or None
+            when early stopping is disabled)
+        """
+        counter = _CardLineCounter(sink)
         # Add buffer: stop when we have target + 2 cards (to ensure we reach target)
         stop_threshold = effective_target + 2
 
         def counting_callback(chunk: str) -> None:
-            """Callback that counts cards."""
-            accumulated_content.append(chunk)
-            full_text = ''.join(accumulated_content)
-
-            # Count lines that look like flashcards (contain tabs)
-            lines = full_text.split('\n')
-            card_count[0] = sum(1 for line in lines if line.count('\t') >= 2)
+            """Callback that records chunks and counts completed cards."""
+            counter.feed(chunk)
 
             # Call the original callback for progress updates
             if progress_callback:
                 progress_callback(chunk)
 
         def should_stop(full_text: str) -> bool:
-            """Check if we have enough cards to stop generation."""
-            lines = full_text.split('\n')
-            current_count = sum(1 for line in lines if line.count('\t') >= 2)
-            if current_count >= stop_threshold:
-                logger.info(f"Generated {current_count} cards, stopping (target: {effective_target})")
+            """
+            Check if we have enough cards to stop generation.
+
+            Ending the stream closes the connection, which makes Ollama
+            abort the request instead of generating cards that get dropped.
+            """
+            if counter.card_count >= stop_threshold:
+                logger.info(f"Generated {counter.card_count} cards, stopping (target: {effective_target})")
                 return True
             return False
 
-        # Use streaming for early stopping capability
-        use_streaming = True
+        return counter, counting_callback, should_stop if self.early_stop else None
 
-        # Prepare output path
-        output_path = Path(output_dir) / f"{unit_name}_anki.txt"
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        flashcard_content = None
-        interrupted = False
+    def _save_generation(
+        self,
+        flashcard_content: Optional[str],
+        effective_target: int,
+        output_path: Path,
+        cache_file: Path,
+        interrupted: bool = False
+    ) -> str:
+        """
+        Truncate generated flashcards to the target and write them to disk.
 
-        try:
-            flashcard_content = self.client.generate_text(
-                prompt=prompt,
-                temperature=self.temperature,
-                stream=use_streaming,
-                progress_callback=counting_callback if use_streaming else None,
-                stop_condition=should_stop
-            )
-        except KeyboardInterrupt:
-            interrupted = True
-            logger.info("Generation interrupted by user")
-
-            # Use accumulated content if available (streaming mode)
-            if accumulated_content:
-                flashcard_content = ''.join(accumulated_content)
-                logger.info(f"Saving {card_count[0]} partially generated cards...")
-            else:
-                logger.warning("No content generated before interruption")
-                raise
+        Args:
+            flashcard_content: Raw model output
+            effective_target: Maximum number of cards to keep
+            output_path: Output .txt file
+            cache_file: Response cache file (only written for complete runs)
+            interrupted: Whether generation was interrupted by the user
 
+        Returns:
+            Path to generated .txt file
+        """
         if not flashcard_content:
             raise RuntimeError("Ollama failed to generate flashcards")
 
         # Truncate to effective_target cards if we exceeded it
-        flashcard_content = self._truncate_to_target(flashcard_content, effective_target)
-
-        # Save to file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(flashcard_content)
+        header_lines, card_lines = self._select_target_lines(flashcard_content, effective_target)
+
+        # Write lines straight through a large buffer instead of joining
+        # them into one more copy of the output first
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            for line in header_lines:
+                f.write(line)
+                f.write('\n')
+            for line in card_lines:
+                f.write(line)
+                f.write('\n')
 
         if interrupted:
             logger.info(f"Saved partial results to {output_path}")
         else:
             logger.info(f"Saved flashcards to {output_path}")
+            self._store_cached_output(cache_file, output_path)
 
         return str(output_path)
 
-    def _truncate_to_target(self, content: str, target_cards: int) -> str:
+    def _select_target_lines(self, content: str, target_cards: int) -> Tuple[List[str], List[str]]:
         """
-        Truncate flashcard content to target number of cards.
+        Split flashcard content into header lines and up to target_cards card lines.
 
         Args:
             content: Full flashcard content
             target_cards: Maximum number of cards to keep
 
         Returns:
-            Truncated content with exactly target_cards or fewer
+            Tuple of (header lines, card lines)
         """
-        lines = content.split('\n')
-
         # Find header lines (first 4 lines)
         header_lines = []
         card_lines = []
         in_headers = True
+        # Cards past the target are only counted, never sliced out
+        surplus_cards = 0
+
+        # Walk line boundaries with str.find so only kept lines are copied
+        start = 0
+        length = len(content)
+        while start <= length:
+            end = content.find('\n', start)
+            if end == -1:
+                end = length
 
-        for line in lines:
             if in_headers:
+                line = content[start:end]
                 header_lines.append(line)
                 # After "Front\tBack\tTags" line, we're done with headers
                 if line.startswith('Front\tBack\tTags'):
                     in_headers = False
-            else:
+            elif _has_two_tabs(content, start, end):
                 # Only count lines with proper tab separation as cards
-                if line.strip() and line.count('\t') >= 2:
-                    card_lines.append(line)
+                if len(card_lines) < target_cards:
+                    line = content[start:end]
+                    if _is_card_line(line):
+                        card_lines.append(line)
+                else:
+                    surplus_cards += 1
+
+            start = end + 1
 
         # Truncate to target
-        if len(card_lines) > target_cards:
-            logger.info(f"Truncating from {len(card_lines)} cards to {target_cards}")
-            card_lines = card_lines[:target_cards]
+        if surplus_cards:
+            logger.info(f"Truncating from {len(card_lines) + surplus_cards} cards to {target_cards}")
         else:
             logger.info(f"Generated {len(card_lines)} cards (target: {target_cards})")
 
-        # Reconstruct content
-        return '\n'.join(header_lines + card_lines) + '\n'
-
-    def validate_output(self, output_path: str) -> Dict[str, Any]:
-        """
-        Validate generated flashcard file.
-
-        Args:
-            output_path: Path to generated .txt file
-
-        Returns:
-            Dictionary with validation results
-        """
-        with open(output_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        results = {
-            'valid': True,
-            'errors': [],
-            'warnings': [],
-            'card_count': 0,
-            'has_headers': False
-        }
-
-        # Check headers
-        if len(lines) < 4:
-            results['valid'] = False
-            results['errors'].append("File too short - missing headers")
-            return results
-
-        if lines[0].strip() != '#separator:tab':
-            results['errors'].append("Missing #separator:tab header")
-        if lines[1].strip() != '#html:true':
-            results['errors'].append("Missing #html:true header")
-        if lines[2].strip() != '#tags column:3':
-            results['errors'].append("Missing #tags column:3 header")
-        if not lines[3].startswith('Front\tBack\tTags'):
-            results['errors'].append("Missing column headers")
-        else:
-            results['has_headers'] = True
-
-        # Count cards (skip header lines)
-        results['card_count'] = len(lines) - 4
-
-        # Check for common issues
-        for i, line in enumerate(lines[4:], start=5):
-            if line.strip():
-                # Check for proper tab separation
-                parts = line.split('\t')
-                if len(parts) != 3:
-                    results['warnings'].append(f"Line {i}: Expected 3 columns, got {len(parts)}")
-
-        if results['errors']:
-            results['valid'] = False
-
-        return results
+        return header_lines, card_lines
 
     def get_context_usage_report(self, unit_name: str, target_cards: int = 60) -> Dict[str, Any]:
         """
@@ -555,16 +806,15 @@ Nothing else. No introductions, no explanations, no markdown formatting around t
         markdown_content = self.load_markdown(unit_name)
         images = self.load_image_metadata(unit_name)
 
-        context_length = self.client.get_context_length()
-
-        # Estimate tokens
-        prompt_overhead = 2000
-        image_tokens = len(images) * 50
-        output_tokens = int(target_cards * 100 * 1.2)
-        content_tokens = self.client.estimate_tokens(markdown_content)
+        budget = self._estimate_token_budget(markdown_content, target_cards, images)
+        context_length = budget['context_length']
+        prompt_overhead = budget['prompt_overhead']
+        image_tokens = budget['image_tokens']
+        output_tokens = budget['output_tokens']
+        content_tokens = budget['content_tokens']
+        available_for_content = budget['available_for_content']
 
         total_estimated = prompt_overhead + image_tokens + content_tokens + output_tokens
-        available_for_content = context_length - prompt_overhead - image_tokens - output_tokens
 
         fits = content_tokens <= available_for_content
         overflow = max(0, total_estimated - context_length)
@@ -4,43 +4,31 @@ Anki model definitions for genanki.
 Defines the note type (model) used for flashcards, with support for custom subjects.
 """
 
+import hashlib
 import genanki
 
 
-def create_model(model_name: str = "Anki Flashcards", model_id: int = None) -> genanki.Model:
-    """
-    Create a genanki model with configurable name and ID.
-
-    Args:
-        model_name: Name of the model/note type
-        model_id: Optional model ID (generates one from name hash if not provided)
-
-    Returns:
-        genanki.Model instance
-    """
-    if model_id is None:
-        # Generate stable ID from model name hash
-        model_id = abs(hash(model_name)) % (2 ** 31)
-
-    return genanki.Model(
-        model_id,
-        model_name,
-        fields=[
-            {'name': 'Front'},
-            {'name': 'Back'},
-            {'name': 'Tags'},
-        ],
-        templates=[
-            {
-                'name': 'Card 1',
-                'qfmt': '<div class="front">{{Front}}</div>',
-                'afmt': '''<div class="front">{{Front}}</div>
+# Note type definition shared by every deck; only the ID and name vary.
+# genanki fills in per-field/template defaults in place when writing, which
+# is identical for every model, so the lists can be shared.
+MODEL_FIELDS = [
+    {'name': 'Front'},
+    {'name': 'Back'},
+    {'name': 'Tags'},
+]
+
+MODEL_TEMPLATES = [
+    {
+        'name': 'Card 1',
+        'qfmt': '<div class="front">{{Front}}</div>',
+        'afmt': '''<div class="front">{{Front}}</div>
 <hr id="answer">
 <div class="back">{{Back}}</div>
 <div class="tags">{{Tags}}</div>''',
-            },
-        ],
-        css='''.card {
+    },
+]
+
+MODEL_CSS = '''.card {
     font-family: arial, sans-serif;
     font-size: 20px;
     text-align: left;
@@ -117,6 +105,32 @@ hr#answer {
     border-top: 2px solid #ccc;
 }
 '''
+
+
+def create_model(model_name: str = "Anki Flashcards", model_id: int = None) -> genanki.Model:
+    """
+    Create a genanki model with configurable name and ID.
+
+    Args:
+        model_name: Name of the model/note type
+        model_id: Optional model ID (derived from the model name if not provided,
+            so the same name yields the same ID on every run)
+
+    Returns:
+        genanki.Model instance
+    """
+    if model_id is None:
+        # Derive the ID from a content hash; built-in hash() of a str is
+        # randomized per interpreter, which gave a new note type every run
+        digest = hashlib.blake2b(model_name.encode('utf-8'), digest_size=4).digest()
+        model_id = int.from_bytes(digest, 'big') % (2 ** 31)
+
+    return genanki.Model(
+        model_id,
+        model_name,
+        fields=MODEL_FIELDS,
+        templates=MODEL_TEMPLATES,
+        css=MODEL_CSS
     )
 
 
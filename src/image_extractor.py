@@ -7,11 +7,45 @@ Extracts image references from HTML content and resolves paths for genanki packa
 import re
 import logging
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 
 logger = logging.getLogger(__name__)
 
+# Matches <img src="..."> tags, capturing the src value
+IMG_SRC_PATTERN = re.compile(r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+
+# Matches the src attribute of an <img> tag, capturing the tag prefix and the value
+IMG_SRC_REWRITE_PATTERN = re.compile(r'(<img\s+[^>]*src=)["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+def _has_img_tag(card_html: str) -> bool:
+    """
+    Cheap check for an <img tag before running the image regexes.
+
+    Most cards have no images, and a substring search is much faster than
+    a regex scan. Upper/mixed-case tags still need the lowercase copy.
+    """
+    if '<img' in card_html:
+        return True
+    return '<' in card_html and '<img' in card_html.lower()
+
+
+# Image paths already confirmed to exist; decks reference the same few
+# images many times, so each file is only stat()ed once. Misses are not
+# cached so an image added later is still picked up.
+_existing_images = set()
+
+
+def _image_exists(absolute_path: str) -> bool:
+    """Check whether an image file exists, remembering files that do."""
+    if absolute_path in _existing_images:
+        return True
+    if Path(absolute_path).exists():
+        _existing_images.add(absolute_path)
+        return True
+    return False
+
 
 def extract_image_references(card_html: str) -> List[str]:
     """
@@ -23,12 +57,9 @@ def extract_image_references(card_html: str) -> List[str]:
     Returns:
         List of image paths found in the HTML
     """
-    # Pattern to match <img src="..."> tags
-    pattern = r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*>'
-
-    matches = re.findall(pattern, card_html, re.IGNORECASE)
-
-    return matches
+    if not _has_img_tag(card_html):
+        return []
+    return IMG_SRC_PATTERN.findall(card_html)
 
 
 def resolve_image_path(relative_path: str, images_dir: str) -> str:
@@ -73,11 +104,7 @@ def prepare_card_for_apkg(card_html: str, images_dir: str) -> Tuple[str, List[st
         - Modified HTML with just filenames in src attributes
         - List of absolute paths to all referenced images
     """
-    # Find all image references
-    image_refs = extract_image_references(card_html)
-
-    if not image_refs:
-        # No images, return as-is
+    if not _has_img_tag(card_html):
         return card_html, []
 
     # Track absolute paths for genanki media
@@ -85,45 +112,64 @@ def prepare_card_for_apkg(card_html: str, images_dir: str) -> Tuple[str, List[st
 
     # Track which images we've already processed (avoid duplicates)
     seen_images = set()
+    ref_count = 0
 
-    # Process each image reference
-    modified_html = card_html
+    def replace_src(match: re.Match) -> str:
+        """Record the referenced image and rewrite its src to the bare filename."""
+        nonlocal ref_count
+        ref_count += 1
+        img_path = match.group(2)
 
-    for img_path in image_refs:
         # Extract filename
-        if '/' in img_path:
-            filename = Path(img_path).name
-        else:
-            filename = img_path
+        filename = Path(img_path).name if '/' in img_path else img_path
 
         # Resolve to absolute path
         absolute_path = resolve_image_path(img_path, images_dir)
 
         # Check if file exists
-        if not Path(absolute_path).exists():
+        if not _image_exists(absolute_path):
             logger.warning(f"Image file not found: {absolute_path}")
-        else:
+        elif filename not in seen_images:
             # Add to media list (only once per unique file)
-            if filename not in seen_images:
-                absolute_paths.append(absolute_path)
-                seen_images.add(filename)
-
-        # Replace the path in HTML with just the filename
-        # This handles the full <img src="..."> tag
-        modified_html = modified_html.replace(
-            f'src="{img_path}"',
-            f'src="{filename}"'
-        )
-        modified_html = modified_html.replace(
-            f"src='{img_path}'",
-            f'src="{filename}"'
-        )
-
-    logger.debug(f"Processed {len(image_refs)} image references, {len(absolute_paths)} unique files")
+            absolute_paths.append(absolute_path)
+            seen_images.add(filename)
+
+        return f'{match.group(1)}"{filename}"'
+
+    # Find and rewrite every image reference in one pass
+    modified_html = IMG_SRC_REWRITE_PATTERN.sub(replace_src, card_html)
+
+    if ref_count:
+        logger.debug(f"Processed {ref_count} image references, {len(absolute_paths)} unique files")
 
     return modified_html, absolute_paths
 
 
+def collect_media(card_html: str, images_dir: str) -> Iterator[str]:
+    """
+    Yield absolute paths of the existing images a card references.
+
+    Same lookup as prepare_card_for_apkg, but without rewriting the HTML,
+    for callers that only need the media files.
+
+    Args:
+        card_html: HTML content of a card
+        images_dir: Path to images directory
+
+    Yields:
+        Absolute path of each referenced image that exists (may repeat)
+    """
+    if not _has_img_tag(card_html):
+        return
+
+    for match in IMG_SRC_REWRITE_PATTERN.finditer(card_html):
+        absolute_path = resolve_image_path(match.group(2), images_dir)
+        if _image_exists(absolute_path):
+            yield absolute_path
+        else:
+            logger.warning(f"Image file not found: {absolute_path}")
+
+
 def get_all_images_for_deck(cards: List[dict], images_dir: str) -> List[str]:
     """
     Get all unique image files referenced across all cards in a deck.
@@ -138,12 +184,7 @@ def get_all_images_for_deck(cards: List[dict], images_dir: str) -> List[str]:
     all_images = set()
 
     for card in cards:
-        # Process front
-        _, front_images = prepare_card_for_apkg(card['front'], images_dir)
-        all_images.update(front_images)
-
-        # Process back
-        _, back_images = prepare_card_for_apkg(card['back'], images_dir)
-        all_images.update(back_images)
+        all_images.update(collect_media(card['front'], images_dir))
+        all_images.update(collect_media(card['back'], images_dir))
 
     return list(all_images)
@@ -5,13 +5,47 @@ Markdown generation module for converting PDF content to markdown.
 import os
 import logging
 import re
-from typing import List, Dict, Optional
+from collections import defaultdict
+from typing import Iterator, List, Dict, Optional
+from src.metadata.storage import MetadataStorage
+
+
+# Runs of three or more newlines, collapsed to a paragraph break
+MULTI_NEWLINE_PATTERN = re.compile(r'\n{3,}')
+
+# Tabs become spaces, then runs of two or more spaces collapse to one
+TAB_TO_SPACE = str.maketrans('\t', ' ')
+SPACE_RUN_PATTERN = re.compile(r' {2,}')
+
+# Characters not allowed in a table of contents anchor
+ANCHOR_INVALID_CHARS_PATTERN = re.compile(r'[^\w\-]')
+
+
+def _collapse_horizontal_space(text: str) -> str:
+    """
+    Collapse runs of spaces and tabs to a single space.
+
+    Same result as re.sub(r'[ \\t]+', ' ', text), but most PDF text has no
+    tabs or double spaces, and substring checks find that without running
+    the regex engine over every character.
+    """
+    if '\t' in text:
+        text = text.translate(TAB_TO_SPACE)
+    if '  ' in text:
+        text = SPACE_RUN_PATTERN.sub(' ', text)
+    return text
 
 
 class MarkdownGenerator:
     """Generate markdown documents from extracted PDF content."""
 
-    def __init__(self, pages_data: List[Dict], images: List[Dict], unit_name: str):
+    def __init__(
+        self,
+        pages_data: List[Dict],
+        images: List[Dict],
+        unit_name: str,
+        metadata_store=None
+    ):
         """
         Initialize markdown generator.
 
@@ -19,6 +53,9 @@ class MarkdownGenerator:
             pages_data: List of page dictionaries from PDFProcessor
             images: List of image dictionaries from PDFProcessor
             unit_name: Name of the unit (for title)
+            metadata_store: Optional MetadataStorage instance to take image
+                descriptions from, so several units share one parse (loaded
+                from disk if omitted)
         """
         self.logger = logging.getLogger(__name__)
         self.pages_data = pages_data
@@ -26,45 +63,47 @@ class MarkdownGenerator:
         self.unit_name = unit_name
 
         # Create mapping of page numbers to images
-        self.images_by_page = {}
+        images_by_page = defaultdict(list)
         for img in images:
-            page = img['page']
-            if page not in self.images_by_page:
-                self.images_by_page[page] = []
-            self.images_by_page[page].append(img)
+            images_by_page[img['page']].append(img)
+        # Plain dict so later lookups of pages without images don't add keys
+        self.images_by_page = dict(images_by_page)
 
         # Load image descriptions from metadata
-        self.image_descriptions = self._load_image_descriptions()
+        self.image_descriptions = self._load_image_descriptions(metadata_store)
 
-    def _load_image_descriptions(self) -> Dict[str, Dict]:
+    def _load_image_descriptions(self, metadata_store=None) -> Dict[str, Dict]:
         """
         Load image descriptions from metadata storage.
 
+        Args:
+            metadata_store: Optional MetadataStorage instance to use as-is
+                instead of loading the metadata file
+
         Returns:
             Dictionary mapping filename to metadata
         """
         try:
-            from src.metadata.storage import MetadataStorage
-
-            metadata_store = MetadataStorage()
-            if metadata_store.load():
-                # Get images for this unit
-                unit_images = metadata_store.get_images_by_unit(self.unit_name)
-
-                # Create mapping
-                descriptions = {
-                    img['filename']: img
-                    for img in unit_images
-                }
-
-                if descriptions:
-                    self.logger.info(
-                        f"Loaded {len(descriptions)} image descriptions for {self.unit_name}"
-                    )
-                return descriptions
-            else:
-                self.logger.debug("No metadata found, images will have no descriptions")
-                return {}
+            if metadata_store is None:
+                metadata_store = MetadataStorage()
+                if not metadata_store.load():
+                    self.logger.debug("No metadata found, images will have no descriptions")
+                    return {}
+
+            # Get images for this unit
+            unit_images = metadata_store.get_images_by_unit(self.unit_name)
+
+            # Create mapping
+            descriptions = {
+                img['filename']: img
+                for img in unit_images
+            }
+
+            if descriptions:
+                self.logger.info(
+                    f"Loaded {len(descriptions)} image descriptions for {self.unit_name}"
+                )
+            return descriptions
 
         except Exception as e:
             self.logger.debug(f"Failed to load image descriptions: {e}")
@@ -77,30 +116,41 @@ class MarkdownGenerator:
         Returns:
             Markdown content as string
         """
-        md_parts = []
+        markdown = "".join(self.iter_markdown_chunks())
+
+        self.logger.info(f"Generated markdown with {len(markdown)} characters")
+        return markdown
+
+    def iter_markdown_chunks(self) -> Iterator[str]:
+        """
+        Generate the markdown document section by section.
 
+        Lets callers write a large document straight to a file instead of
+        first building it as one string; joined, the chunks equal
+        generate_markdown().
+
+        Yields:
+            Consecutive pieces of the markdown document
+        """
         # Title
-        title = self._generate_title()
-        md_parts.append(title)
+        yield self._generate_title()
 
         # Metadata
-        md_parts.append(self._generate_metadata())
+        yield "\n\n"
+        yield self._generate_metadata()
 
         # Table of Contents (placeholder for now)
-        # md_parts.append(self._create_toc())
+        # yield "\n\n"
+        # yield self._create_toc()
 
         # Content by pages
-        content = self._generate_content()
-        md_parts.append(content)
+        yield "\n\n"
+        yield from self._iter_content()
 
         # Image references section
         if self.images:
-            md_parts.append(self._generate_image_references())
-
-        markdown = "\n\n".join(md_parts)
-
-        self.logger.info(f"Generated markdown with {len(markdown)} characters")
-        return markdown
+            yield "\n\n"
+            yield self._generate_image_references()
 
     def _generate_title(self) -> str:
         """Generate markdown title."""
@@ -123,7 +173,16 @@ class MarkdownGenerator:
         Returns:
             Markdown content
         """
-        content_parts = []
+        return "".join(self._iter_content())
+
+    def _iter_content(self) -> Iterator[str]:
+        """
+        Generate main content one page at a time.
+
+        Yields:
+            Markdown for each page with text, separated by blank lines
+        """
+        separator = ""
 
         for page_data in self.pages_data:
             page_num = page_data['page_num']
@@ -133,19 +192,20 @@ class MarkdownGenerator:
                 continue
 
             # Add page marker
-            content_parts.append(f"## Page {page_num}\n")
+            page_parts = [f"## Page {page_num}\n"]
 
             # Process and format text
             formatted_text = self._format_text(text)
-            content_parts.append(formatted_text)
+            page_parts.append(formatted_text)
 
             # Insert images for this page
-            if page_num in self.images_by_page:
-                image_refs = self._insert_image_references(page_num)
-                if image_refs:
-                    content_parts.append(image_refs)
+            image_refs = self._insert_image_references(page_num)
+            if image_refs:
+                page_parts.append(image_refs)
 
-        return "\n\n".join(content_parts)
+            yield separator
+            yield "\n\n".join(page_parts)
+            separator = "\n\n"
 
     def _format_text(self, text: str) -> str:
         """
@@ -157,14 +217,20 @@ class MarkdownGenerator:
         Returns:
             Formatted markdown text
         """
+        # Whitespace is collapsed in linear time: every pattern here is a
+        # single character class under one quantifier, so inputs like the
+        # megabyte-long runs of spaces or newlines some scanned PDFs produce
+        # cannot trigger backtracking, and clean text skips the regex entirely
+
         # Convert multiple newlines to double newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        if '\n\n\n' in text:
+            text = MULTI_NEWLINE_PATTERN.sub('\n\n', text)
 
         # Try to detect and format mathematical notation
         text = self._convert_math_notation(text)
 
         # Clean up excessive whitespace
-        text = re.sub(r'[ \t]+', ' ', text)
+        text = _collapse_horizontal_space(text)
 
         return text.strip()
 
@@ -200,42 +266,37 @@ class MarkdownGenerator:
         Returns:
             Markdown image references with descriptions
         """
-        if page_num not in self.images_by_page:
+        # Most pages have no images, so this one lookup is all they cost
+        page_images = self.images_by_page.get(page_num)
+        if not page_images:
             return ""
 
-        image_refs = []
-
         # Add section header
-        page_images = self.images_by_page[page_num]
-        if len(page_images) > 0:
-            image_refs.append("### Available Images")
+        image_refs = ["### Available Images"]
 
         for img in page_images:
             filename = img['filename']
             rel_path = f"../images/{filename}"
 
             # Create markdown image reference
-            img_ref = f"![{filename}]({rel_path})"
+            ref_lines = [f"![{filename}]({rel_path})"]
 
             # Add description if available
-            if filename in self.image_descriptions:
-                metadata = self.image_descriptions[filename]
+            metadata = self.image_descriptions.get(filename)
+            if metadata:
                 description = metadata.get('description')
                 img_type = metadata.get('type', 'diagram')
                 contains_math = metadata.get('contains_math', False)
 
                 if description:
                     math_indicator = "Math: yes" if contains_math else "Math: no"
-                    desc_text = f"**Description:** {description} (Type: {img_type}, {math_indicator})"
-
-                    img_ref = f"{img_ref}\n{desc_text}"
-
-            image_refs.append(img_ref)
+                    ref_lines.append(
+                        f"**Description:** {description} (Type: {img_type}, {math_indicator})"
+                    )
 
-        if image_refs:
-            return "\n\n" + "\n\n".join(image_refs)
+            image_refs.append("\n".join(ref_lines))
 
-        return ""
+        return "\n\n" + "\n\n".join(image_refs)
 
     def _generate_image_references(self) -> str:
         """
@@ -258,19 +319,17 @@ class MarkdownGenerator:
             rel_path = f"../images/{filename}"
 
             # Basic reference
-            ref = f"- [{filename}]({rel_path}) - Page {page} ({width}x{height})"
+            refs.append(f"- [{filename}]({rel_path}) - Page {page} ({width}x{height})")
 
             # Add description if available
-            if filename in self.image_descriptions:
-                metadata = self.image_descriptions[filename]
+            metadata = self.image_descriptions.get(filename)
+            if metadata:
                 description = metadata.get('description')
 
                 if description:
                     # Truncate description for summary
                     short_desc = description[:80] + "..." if len(description) > 80 else description
-                    ref += f"\n  - {short_desc}"
-
-            refs.append(ref)
+                    refs.append(f"  - {short_desc}")
 
         return "\n".join(refs)
 
@@ -293,7 +352,7 @@ class MarkdownGenerator:
             # Create anchor link
             anchor = heading.lower().replace(' ', '-').replace(':', '')
             # Remove special characters
-            anchor = re.sub(r'[^\w\-]', '', anchor)
+            anchor = ANCHOR_INVALID_CHARS_PATTERN.sub('', anchor)
 
             toc_entry = f"- [{heading}](#{anchor})"
             toc_parts.append(toc_entry)
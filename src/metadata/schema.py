@@ -3,10 +3,29 @@ Schema definitions for image metadata.
 """
 
 from typing import Optional, Dict, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 
 
+def _with_slots(cls):
+    """
+    Rebuild a dataclass with __slots__ instead of a per-instance __dict__.
+
+    Equivalent to @dataclass(slots=True), which needs Python 3.10.
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    # Defaults live in the generated __init__; class attributes would
+    # clash with the slot descriptors
+    for name in field_names:
+        namespace.pop(name, None)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    namespace['__slots__'] = field_names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_with_slots
 @dataclass
 class ImageMetadata:
     """
@@ -37,7 +56,21 @@ class ImageMetadata:
 
     def to_dict(self) -> Dict:
         """Convert to dictionary."""
-        return asdict(self)
+        # Built by hand: dataclasses.asdict reflects over the fields and
+        # deep-copies every value on each call
+        dimensions = self.dimensions
+        return {
+            'filename': self.filename,
+            'unit': self.unit,
+            'page': self.page,
+            'path': self.path,
+            'dimensions': dict(dimensions) if isinstance(dimensions, dict) else dimensions,
+            'extracted_at': self.extracted_at,
+            'description': self.description,
+            'type': self.type,
+            'contains_math': self.contains_math,
+            'described_at': self.described_at
+        }
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'ImageMetadata':
@@ -60,6 +93,20 @@ class MetadataCollection:
     generated_at: str
     ollama_model: str
     images: Dict[str, ImageMetadata]
+    # Images grouped by unit, kept in step with images (not serialized)
+    _by_unit: Dict[str, List[ImageMetadata]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # Number of images with a description, kept in step with images
+    _described_count: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Index the initial images by unit and count described ones."""
+        for img in self.images.values():
+            if isinstance(img, ImageMetadata):
+                self._by_unit.setdefault(img.unit, []).append(img)
+                if img.description is not None:
+                    self._described_count += 1
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization."""
@@ -90,18 +137,37 @@ class MetadataCollection:
 
     def add_image(self, image_meta: ImageMetadata):
         """Add or update image metadata."""
+        previous = self.images.get(image_meta.filename)
         self.images[image_meta.filename] = image_meta
 
+        if image_meta.description is not None:
+            self._described_count += 1
+
+        if isinstance(previous, ImageMetadata):
+            if previous.description is not None:
+                self._described_count -= 1
+            unit_images = self._by_unit[previous.unit]
+            index = next(i for i, img in enumerate(unit_images) if img is previous)
+            if previous.unit == image_meta.unit:
+                # Updated in place, like the entry in images
+                unit_images[index] = image_meta
+                return
+            del unit_images[index]
+
+        self._by_unit.setdefault(image_meta.unit, []).append(image_meta)
+
+    def set_description(self, image_meta: ImageMetadata, description: Optional[str]):
+        """Set an image's description, keeping the described count current."""
+        self._described_count += (description is not None) - (image_meta.description is not None)
+        image_meta.description = description
+
     def get_image(self, filename: str) -> Optional[ImageMetadata]:
         """Get image metadata by filename."""
         return self.images.get(filename)
 
     def get_images_by_unit(self, unit: str) -> List[ImageMetadata]:
         """Get all images for a specific unit."""
-        return [
-            img for img in self.images.values()
-            if isinstance(img, ImageMetadata) and img.unit == unit
-        ]
+        return list(self._by_unit.get(unit, []))
 
     def count(self) -> int:
         """Get total number of images."""
@@ -109,7 +175,4 @@ class MetadataCollection:
 
     def count_described(self) -> int:
         """Get number of images with descriptions."""
-        return sum(
-            1 for img in self.images.values()
-            if isinstance(img, ImageMetadata) and img.description is not None
-        )
+        return self._described_count
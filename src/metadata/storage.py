@@ -4,22 +4,60 @@ JSON-based storage for image metadata.
 
 import json
 import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from PIL import Image
 
 from src.metadata.schema import ImageMetadata, MetadataCollection
+from src.utils import read_json, write_json
 
 logger = logging.getLogger(__name__)
 
+# Image fields an update journal entry may change
+JOURNAL_FIELDS = ('description', 'type', 'contains_math', 'described_at')
+
+# Upper bound on threads reading image headers for missing dimensions
+MAX_DIMENSION_READERS = 8
+
+
+def _dimensions_source(img_data: Dict) -> Optional[str]:
+    """Get the file to read an image's size from, if its size is not known."""
+    dimensions = img_data.get('dimensions', {'width': 0, 'height': 0})
+    if dimensions and dimensions.get('width', 0) != 0:
+        return None
+
+    img_path = img_data.get('path') or img_data.get('filename')
+    if img_path and Path(img_path).exists():
+        return img_path
+    return None
+
+
+def _read_image_dimensions(img_path: str) -> Dict[str, int]:
+    """Read an image's size; PIL only parses the header for this, not the pixels."""
+    try:
+        with Image.open(img_path) as pil_img:
+            return {'width': pil_img.width, 'height': pil_img.height}
+    except Exception as e:
+        logger.debug(f"Could not read image dimensions: {e}")
+        return {'width': 0, 'height': 0}
+
 
 class MetadataStorage:
     """
     Manages persistent storage of image metadata in JSON format.
 
+    Description updates are also appended to a JSON Lines journal next to
+    the metadata file as they happen, so they survive a run that ends
+    before save(). load() replays the journal and save() folds it into the
+    metadata file.
+
     Attributes:
         metadata_file: Path to JSON metadata file
+        journal_file: Path to the JSON Lines update journal
         collection: In-memory metadata collection
     """
 
@@ -31,7 +69,12 @@ class MetadataStorage:
             metadata_file: Path to JSON file for storing metadata
         """
         self.metadata_file = Path(metadata_file)
+        self.journal_file = self.metadata_file.with_suffix('.jsonl')
         self.collection: Optional[MetadataCollection] = None
+        # File mtimes the collection matches; None once it diverges
+        self._synced_state: Optional[Tuple[int, Optional[int]]] = None
+        # Whether this instance already backed up the file it first replaced
+        self._backed_up = False
 
         # Ensure directory exists
         self.metadata_file.parent.mkdir(parents=True, exist_ok=True)
@@ -43,6 +86,9 @@ class MetadataStorage:
         """
         Load metadata from JSON file.
 
+        The file is not re-read if it is unchanged since the last load or
+        save and the collection has not been modified since.
+
         Returns:
             True if loaded successfully, False otherwise
         """
@@ -51,12 +97,19 @@ class MetadataStorage:
             self._create_new_collection()
             return False
 
+        state = self._disk_state()
+        if self.collection is not None and state == self._synced_state:
+            return True
+
         try:
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json(self.metadata_file)
 
             self.collection = MetadataCollection.from_dict(data)
+            replayed = self._replay_journal()
+            self._synced_state = state
             logger.info(f"Loaded {self.collection.count()} images from {self.metadata_file}")
+            if replayed:
+                logger.info(f"Replayed {replayed} unsaved updates from {self.journal_file}")
             return True
 
         except Exception as e:
@@ -68,8 +121,12 @@ class MetadataStorage:
         """
         Save metadata to JSON file.
 
+        The file is written to a temporary file first and moved into place,
+        so an interrupted save never leaves a truncated metadata file.
+
         Args:
-            backup: Whether to create backup of existing file
+            backup: Whether to back up the existing file (once per instance,
+                keeping the file as it was before the first save)
 
         Returns:
             True if saved successfully, False otherwise
@@ -80,17 +137,24 @@ class MetadataStorage:
 
         try:
             # Backup existing file
-            if backup and self.metadata_file.exists():
+            if backup and not self._backed_up and self.metadata_file.exists():
                 backup_path = self.metadata_file.with_suffix('.json.bak')
-                self.metadata_file.rename(backup_path)
+                shutil.copyfile(self.metadata_file, backup_path)
+                self._backed_up = True
                 logger.debug(f"Created backup: {backup_path}")
 
             # Update generated_at timestamp
             self.collection.generated_at = datetime.now().isoformat()
 
             # Write to file
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.collection.to_dict(), f, indent=2, ensure_ascii=False)
+            tmp_file = self.metadata_file.with_suffix('.json.tmp')
+            write_json(tmp_file, self.collection.to_dict())
+            os.replace(tmp_file, self.metadata_file)
+
+            # Journaled updates are part of the file now
+            if self.journal_file.exists():
+                self.journal_file.unlink()
+            self._synced_state = self._disk_state()
 
             logger.info(f"Saved {self.collection.count()} images to {self.metadata_file}")
             return True
@@ -99,6 +163,71 @@ class MetadataStorage:
             logger.error(f"Failed to save metadata: {e}")
             return False
 
+    def _disk_state(self) -> Tuple[int, Optional[int]]:
+        """Get the modification times of the metadata file and the journal."""
+        journal_mtime = self.journal_file.stat().st_mtime_ns if self.journal_file.exists() else None
+        return self.metadata_file.stat().st_mtime_ns, journal_mtime
+
+    def _replay_journal(self) -> int:
+        """
+        Apply journaled updates to the loaded collection.
+
+        Returns:
+            Number of updates applied
+        """
+        if not self.journal_file.exists():
+            return 0
+
+        applied = 0
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line cut short by a crash mid-append
+                    logger.warning(f"Skipping malformed journal entry in {self.journal_file}")
+                    continue
+
+                image_meta = self.collection.get_image(entry.get('filename'))
+                if image_meta is None:
+                    continue
+
+                for key in JOURNAL_FIELDS:
+                    if key not in entry:
+                        continue
+                    if key == 'description':
+                        # Through the collection so its described count stays current
+                        self.collection.set_description(image_meta, entry[key])
+                    else:
+                        setattr(image_meta, key, entry[key])
+                applied += 1
+
+        return applied
+
+    def append_update(self, filename: str, changes: Dict) -> None:
+        """
+        Append an image update to the journal.
+
+        Writes one short line instead of rewriting the whole metadata file;
+        the update is replayed by load() until the next save().
+
+        Args:
+            filename: Image filename
+            changes: Changed fields (see JOURNAL_FIELDS)
+        """
+        self.append_updates([{'filename': filename, **changes}])
+
+    def append_updates(self, entries: List[Dict]) -> None:
+        """
+        Append several image updates to the journal in a single write.
+
+        Args:
+            entries: Dictionaries with 'filename' and changed fields
+        """
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
     def add_images(self, images: List[Dict], unit: str = None):
         """
         Add multiple images to metadata.
@@ -109,22 +238,31 @@ class MetadataStorage:
         """
         if self.collection is None:
             self._create_new_collection()
+        self._synced_state = None
 
+        # pdf_processor reports sizes; files are only opened for images
+        # without one, and those header reads run concurrently
+        sources = []
         for img_data in images:
+            try:
+                sources.append(_dimensions_source(img_data))
+            except Exception:
+                # Reported when the image itself is added below
+                sources.append(None)
+
+        pending = list(dict.fromkeys(path for path in sources if path))
+        read_dimensions = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(MAX_DIMENSION_READERS, len(pending))) as executor:
+                read_dimensions = dict(zip(pending, executor.map(_read_image_dimensions, pending)))
+
+        for img_data, source in zip(images, sources):
             try:
                 # Extract dimensions if image file exists
-                dimensions = img_data.get('dimensions', {'width': 0, 'height': 0})
-
-                if not dimensions or dimensions.get('width', 0) == 0:
-                    # Try to read from file
-                    img_path = img_data.get('path') or img_data.get('filename')
-                    if img_path and Path(img_path).exists():
-                        try:
-                            with Image.open(img_path) as pil_img:
-                                dimensions = {'width': pil_img.width, 'height': pil_img.height}
-                        except Exception as e:
-                            logger.debug(f"Could not read image dimensions: {e}")
-                            dimensions = {'width': 0, 'height': 0}
+                if source:
+                    dimensions = read_dimensions[source]
+                else:
+                    dimensions = img_data.get('dimensions', {'width': 0, 'height': 0})
 
                 # Create metadata object
                 image_meta = ImageMetadata(
@@ -161,14 +299,35 @@ class MetadataStorage:
             img_type: Image type (network, algorithm, etc.)
             contains_math: Whether image contains math
         """
+        self.update_descriptions([(filename, description, img_type, contains_math)])
+
+    def update_descriptions(
+        self,
+        updates: List[Tuple[str, str, Optional[str], Optional[bool]]]
+    ) -> int:
+        """
+        Update descriptions for several images, journaling them in one write.
+
+        Args:
+            updates: (filename, description, img_type, contains_math) tuples,
+                with the same meaning as the update_description arguments
+
+        Returns:
+            Number of images updated
+        """
         if self.collection is None:
             logger.warning("No collection loaded")
-            return
+            return 0
 
-        image_meta = self.collection.get_image(filename)
+        entries = []
+        for filename, description, img_type, contains_math in updates:
+            image_meta = self.collection.get_image(filename)
+            if not image_meta:
+                logger.warning(f"Image {filename} not found in metadata")
+                continue
 
-        if image_meta:
-            image_meta.description = description
+            self._synced_state = None
+            self.collection.set_description(image_meta, description)
             image_meta.described_at = datetime.now().isoformat()
 
             if img_type:
@@ -177,9 +336,19 @@ class MetadataStorage:
             if contains_math is not None:
                 image_meta.contains_math = contains_math
 
+            entries.append({
+                'filename': filename,
+                **{key: getattr(image_meta, key) for key in JOURNAL_FIELDS}
+            })
             logger.debug(f"Updated description for {filename}")
-        else:
-            logger.warning(f"Image {filename} not found in metadata")
+
+        if entries:
+            try:
+                self.append_updates(entries)
+            except OSError as e:
+                logger.warning(f"Could not journal {len(entries)} description update(s): {e}")
+
+        return len(entries)
 
     def get_all_images(self) -> List[Dict]:
         """
@@ -4,14 +4,201 @@ HTTP client for Ollama API.
 Provides low-level interface to Ollama's vision capabilities.
 """
 
+import asyncio
+import functools
+import gzip
 import httpx
+import importlib.util
+import inspect
+import json
 import logging
+import random
+import re
 import time
-from typing import Optional, Dict, Any, Callable
-from pathlib import Path
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
+# Bodies smaller than this are sent uncompressed; gzip overhead isn't worth it
+_MIN_COMPRESS_BYTES = 8192
+
+# Retry delays double from _BACKOFF_BASE up to _BACKOFF_CAP seconds, each
+# stretched by up to _BACKOFF_JITTER so parallel workers don't retry in step
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 30.0
+_BACKOFF_JITTER = 0.5
+
+# The "response" field of a streamed /api/generate line, as Ollama writes it
+# (no whitespace); only used when the captured text has no escapes
+_RESPONSE_FIELD_PATTERN = re.compile(rb'"response":"((?:[^"\\]|\\.)*)"')
+
+# Image bytes base64-encoded per read; a multiple of 3, so chunks encode
+# without padding and concatenate to the same output as one encode
+_B64_CHUNK_BYTES = 57 * 1024
+
+# httpx only supports HTTP/2 with the optional h2 package (httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:  # optional SIMD encoder; the standard library gives the same output
+    from base64 import b64encode as _b64encode
+
+try:
+    import orjson
+except ImportError:  # optional; request bodies are serialized with json instead
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:  # optional; estimate_tokens falls back to a character heuristic
+    tiktoken = None
+
+try:
+    import tokenizers
+except ImportError:  # optional; only needed for a model-specific tokenizer
+    tokenizers = None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_token_encoding():
+    """Load the tiktoken encoding once, or None if tiktoken is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # First use downloads the BPE file, which fails offline
+        logger.debug(f"tiktoken encoding unavailable, using heuristic: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_hf_tokenizer(name: str):
+    """Load a Hugging Face tokenizer by name once, or None if it can't be loaded."""
+    if tokenizers is None:
+        logger.debug(f"tokenizers not installed, ignoring tokenizer '{name}'")
+        return None
+    try:
+        return tokenizers.Tokenizer.from_pretrained(name)
+    except Exception as e:
+        # Downloaded from the Hugging Face Hub on first use, which fails offline
+        logger.debug(f"Tokenizer '{name}' unavailable, using fallback: {e}")
+        return None
+
+
+def _json_body(payload: Dict[str, Any]) -> bytes:
+    """Serialize a request payload to UTF-8 JSON, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _normalize_model_name(name: str) -> str:
+    """Add the implicit ':latest' tag to a model name without one."""
+    # A ':' before the last '/' belongs to a registry host, not a tag
+    if ':' in name.rsplit('/', 1)[-1]:
+        return name
+    return f"{name}:latest"
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Get the jittered, capped wait in seconds before retry number attempt + 1."""
+    delay = min(_BACKOFF_CAP, _BACKOFF_BASE * (2 ** attempt))
+    return delay * (1 + random.random() * _BACKOFF_JITTER)
+
+
+def _iter_ndjson_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Split a raw byte stream into lines, carrying partial lines across chunks.
+
+    Cheaper than httpx's iter_lines, which decodes every line to str first.
+    """
+    pending = b''
+    for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+async def _aiter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Async version of _iter_ndjson_lines."""
+    pending = b''
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _response_text(line: bytes) -> str:
+    """
+    Get the generated text from one line of a streamed /api/generate reply.
+
+    Most lines carry a short token without escape sequences, which is read
+    straight from the line; anything else goes through a full JSON parse.
+
+    Returns:
+        The line's "response" text, or "" for blank or malformed lines
+    """
+    match = _RESPONSE_FIELD_PATTERN.search(line)
+    if match and b'\\' not in match.group(1):
+        return match.group(1).decode('utf-8', errors='replace')
+
+    try:
+        return json.loads(line).get("response", "")
+    except ValueError:
+        # Invalid JSON or invalid UTF-8
+        return ""
+
+
+def _image_request_body(model: str, prompt: str, image_path: str, stream: bool) -> bytes:
+    """
+    Build the JSON body for a vision request.
+
+    The image is base64-encoded straight into the body one chunk at a time,
+    so the raw file, its encoded string and the serialized payload are never
+    all held in memory at once. Chunks are read into one reused buffer.
+
+    Args:
+        model: Vision model name
+        prompt: Text prompt for the model
+        image_path: Image file to attach
+        stream: Whether to request a streamed response
+
+    Returns:
+        UTF-8 JSON body equivalent to json.dumps of the payload dict
+
+    Raises:
+        FileNotFoundError: If image file doesn't exist
+    """
+    try:
+        # Opening is the existence check; no separate stat beforehand
+        image = open(image_path, 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Image not found: {image_path}") from None
+
+    body = bytearray(b'{"model": ')
+    body += json.dumps(model).encode('utf-8')
+    body += b', "prompt": '
+    body += json.dumps(prompt).encode('utf-8')
+    body += b', "images": ["'
+    buffer = bytearray(_B64_CHUNK_BYTES)
+    view = memoryview(buffer)
+    with image as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            body += _b64encode(view[:size])
+    body += b'"], "stream": '
+    body += b'true}' if stream else b'false}'
+    return bytes(body)
+
 
 class OllamaClient:
     """
@@ -29,7 +216,10 @@ class OllamaClient:
         base_url: str = "http://localhost:11434",
         model: str = "ministral-3:8b",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        compress_requests: bool = False,
+        http_client: Optional[httpx.Client] = None,
+        tokenizer: Optional[str] = None
     ):
         """
         Initialize Ollama client.
@@ -39,44 +229,143 @@ class OllamaClient:
             model: Vision model to use
             timeout: Request timeout in seconds (0 or -1 to disable)
             max_retries: Maximum retry attempts
+            compress_requests: Gzip large text-generation request bodies. Only
+                enable when the server (or a proxy in front of it) accepts
+                Content-Encoding: gzip; plain Ollama does not.
+            http_client: Optional httpx.Client to share a connection pool with
+                other clients (not closed by close())
+            tokenizer: Optional Hugging Face tokenizer name matching the model
+                (e.g. "mistralai/Ministral-8B-Instruct-2410"), used by
+                estimate_tokens when the tokenizers package is installed
         """
         self.base_url = base_url.rstrip('/')
         self.model = model
         # Convert 0 or -1 to None (disable timeout)
         self.timeout = None if timeout in (0, -1) else timeout
         self.max_retries = max_retries
+        self.compress_requests = compress_requests
+        self.tokenizer = tokenizer
+
+        # One pooled client for every request so keep-alive connections are
+        # reused instead of reconnecting per call
+        self._owns_http = http_client is None
+        self._http = http_client if http_client is not None else httpx.Client(**self._client_options())
+
+        # /api/show response and context length per model name; constant
+        # for a loaded model
+        self._model_info_cache: Dict[str, Dict[str, Any]] = {}
+        self._context_length_cache: Dict[str, int] = {}
+
+        # Set once the server has confirmed the model; failures are not
+        # cached so a server started later is still picked up
+        self._availability_checked: Optional[bool] = None
+
+        # Created lazily inside the running event loop by agenerate_text
+        self._async_http: Optional[httpx.AsyncClient] = None
+
+    def _client_options(self) -> Dict[str, Any]:
+        """
+        Get shared settings for the sync and async HTTP clients.
 
-    def check_availability(self) -> bool:
+        HTTP/2 is enabled when the optional h2 package is installed; it is
+        negotiated over TLS (e.g. a remote Ollama behind a proxy) and lets
+        concurrent streams share one connection.
+        """
+        return {
+            "http2": _HTTP2_AVAILABLE,
+            "timeout": httpx.Timeout(self.timeout, connect=10.0),
+            "limits": httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=40,
+                keepalive_expiry=30.0
+            ),
+            "headers": {"Accept-Encoding": "gzip, deflate"}
+        }
+
+    def _generate_body(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the request body arguments for a text-generation payload.
+
+        The payload is serialized once here, so retries resend the same bytes.
+
+        Returns:
+            httpx keyword arguments: gzip-compressed content when
+            compress_requests is set and the body is large, else plain JSON
+        """
+        body = _json_body(payload)
+        if not self.compress_requests or len(body) < _MIN_COMPRESS_BYTES:
+            return {"content": body, "headers": {"Content-Type": "application/json"}}
+
+        return {
+            "content": gzip.compress(body, compresslevel=5),
+            "headers": {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        }
+
+    def close(self) -> None:
+        """Close pooled HTTP connections (unless the client was shared in)."""
+        if self._owns_http:
+            self._http.close()
+
+    async def aclose(self) -> None:
+        """Close the async client, if one was opened."""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+
+    def _get_async_http(self) -> httpx.AsyncClient:
+        """Get the async client, creating it inside the running event loop on first use."""
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(**self._client_options())
+        return self._async_http
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+    def check_availability(self, force: bool = False) -> bool:
         """
         Check if Ollama server is available and model is pulled.
 
+        A successful check is remembered, so later calls (e.g. once per
+        image or generation request) don't query /api/tags again.
+
+        Args:
+            force: Query the server even if it was already found available
+
         Returns:
             True if Ollama is available and ready, False otherwise
         """
+        if self._availability_checked and not force:
+            return True
+
         try:
             # Check server
-            with httpx.Client(timeout=5.0) as client:
-                response = client.get(f"{self.base_url}/api/tags")
-                if response.status_code != 200:
-                    logger.warning("Ollama server not responding")
-                    return False
-
-                # Check if model is available
-                data = response.json()
-                models = [m['name'] for m in data.get('models', [])]
-
-                # Check for exact match or partial match (e.g., "ministral-3:8b" or "ministral-3:latest")
-                model_available = any(
-                    self.model in model_name or model_name in self.model
-                    for model_name in models
-                )
+            response = self._http.get(f"{self.base_url}/api/tags", timeout=5.0)
+            if response.status_code != 200:
+                logger.warning("Ollama server not responding")
+                return False
+
+            # Check if model is available
+            data = response.json()
+            models = [m['name'] for m in data.get('models', [])]
+
+            # Compare names the way Ollama resolves them, so "ministral-3"
+            # matches "ministral-3:latest" but "llama3" doesn't match "llama3.2"
+            model_available = _normalize_model_name(self.model) in {
+                _normalize_model_name(model_name) for model_name in models
+            }
 
-                if not model_available:
-                    logger.warning(f"Model '{self.model}' not found. Available: {models}")
-                    return False
+            if not model_available:
+                logger.warning(f"Model '{self.model}' not found. Available: {models}")
+                return False
 
-                logger.info(f"Ollama available with model: {self.model}")
-                return True
+            logger.info(f"Ollama available with model: {self.model}")
+            self._availability_checked = True
+            return True
 
         except Exception as e:
             logger.debug(f"Ollama not available: {e}")
@@ -103,43 +392,29 @@ class OllamaClient:
             FileNotFoundError: If image file doesn't exist
             httpx.TimeoutException: If request times out
         """
-        image_file = Path(image_path)
-        if not image_file.exists():
-            raise FileNotFoundError(f"Image not found: {image_path}")
-
-        # Read and encode image as base64
-        import base64
-        with open(image_file, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
-
-        # Prepare request
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "images": [image_data],
-            "stream": stream
-        }
+        # Serialize once; the same body is resent on retries
+        body = _image_request_body(self.model, prompt, image_path, stream)
 
         # Retry logic with exponential backoff
         for attempt in range(self.max_retries):
             try:
-                with httpx.Client(timeout=self.timeout) as client:
-                    response = client.post(
-                        f"{self.base_url}/api/generate",
-                        json=payload
-                    )
+                response = self._http.post(
+                    f"{self.base_url}/api/generate",
+                    content=body,
+                    headers={"Content-Type": "application/json"}
+                )
 
-                    if response.status_code == 200:
-                        result = response.json()
-                        return result.get('response', '').strip()
-                    else:
-                        logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                        return None
+                if response.status_code == 200:
+                    result = response.json()
+                    return result.get('response', '').strip()
+                else:
+                    logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                    return None
 
             except httpx.TimeoutException:
                 if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    logger.warning(f"Timeout on attempt {attempt + 1}, retrying in {wait_time}s...")
+                    wait_time = _backoff_delay(attempt)  # Exponential backoff: ~1s, 2s, 4s
+                    logger.warning(f"Timeout on attempt {attempt + 1}, retrying in {wait_time:.1f}s...")
                     time.sleep(wait_time)
                 else:
                     logger.error(f"Timeout after {self.max_retries} attempts")
@@ -151,6 +426,64 @@ class OllamaClient:
 
         return None
 
+    async def agenerate_with_image(
+        self,
+        prompt: str,
+        image_path: str
+    ) -> Optional[str]:
+        """
+        Async version of generate_with_image for describing several images concurrently.
+
+        Call aclose() before the event loop ends.
+
+        Args:
+            prompt: Text prompt for the model
+            image_path: Path to image file
+
+        Returns:
+            Generated text response, or None if failed
+
+        Raises:
+            FileNotFoundError: If image file doesn't exist
+            httpx.TimeoutException: If request times out
+        """
+        http = self._get_async_http()
+
+        # Read and encode off the event loop; the body is resent on retries
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(
+            None, _image_request_body, self.model, prompt, image_path, False
+        )
+
+        for attempt in range(self.max_retries):
+            try:
+                response = await http.post(
+                    f"{self.base_url}/api/generate",
+                    content=body,
+                    headers={"Content-Type": "application/json"}
+                )
+
+                if response.status_code == 200:
+                    return response.json().get('response', '').strip()
+
+                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                return None
+
+            except httpx.TimeoutException:
+                if attempt < self.max_retries - 1:
+                    wait_time = _backoff_delay(attempt)
+                    logger.warning(f"Timeout on attempt {attempt + 1}, retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.error(f"Timeout after {self.max_retries} attempts")
+                    raise
+
+            except Exception as e:
+                logger.error(f"Ollama API error: {e}")
+                return None
+
+        return None
+
     def generate_text(
         self,
         prompt: str,
@@ -158,7 +491,9 @@ class OllamaClient:
         temperature: float = 0.7,
         stream: bool = False,
         progress_callback: Optional[Callable[[str], None]] = None,
-        stop_condition: Optional[Callable[[str], bool]] = None
+        stop_condition: Optional[Callable[[str], bool]] = None,
+        keep_alive: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None
     ) -> Optional[str]:
         """
         Generate text from prompt using Ollama.
@@ -170,6 +505,8 @@ class OllamaClient:
             stream: Whether to stream the response
             progress_callback: Optional callback function(chunk: str) for streaming updates
             stop_condition: Optional callback(full_text) -> bool that returns True to stop generation early
+            keep_alive: How long to keep the model (and its prompt cache) loaded, e.g. "30m"
+            options: Extra Ollama model options (e.g. num_predict, stop)
 
         Returns:
             Generated text or None if failed
@@ -183,61 +520,58 @@ class OllamaClient:
             "prompt": prompt,
             "stream": stream,
             "options": {
-                "temperature": temperature
+                "temperature": temperature,
+                **(options or {})
             }
         }
 
         if system:
             payload["system"] = system
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        body = self._generate_body(payload)
 
         for attempt in range(self.max_retries):
             try:
-                with httpx.Client(timeout=self.timeout) as client:
-                    if stream:
-                        # Stream the response
-                        full_response = ""
-                        stopped_early = False
-                        with client.stream(
-                            "POST",
-                            f"{self.base_url}/api/generate",
-                            json=payload
-                        ) as response:
-                            response.raise_for_status()
-
-                            import json as json_module
-                            for line in response.iter_lines():
-                                if line.strip():
-                                    try:
-                                        chunk_data = json_module.loads(line)
-                                        chunk = chunk_data.get("response", "")
-                                        if chunk:
-                                            full_response += chunk
-                                            if progress_callback:
-                                                progress_callback(chunk)
-                                            # Check stop condition
-                                            if stop_condition and stop_condition(full_response):
-                                                logger.info("Stop condition met, ending generation early")
-                                                stopped_early = True
-                                                break
-                                    except json_module.JSONDecodeError:
-                                        continue
-
-                        return full_response
-                    else:
-                        # Non-streaming mode (original behavior)
-                        response = client.post(
-                            f"{self.base_url}/api/generate",
-                            json=payload
-                        )
+                if stream:
+                    # Stream the response
+                    full_response = ""
+                    stopped_early = False
+                    with self._http.stream(
+                        "POST",
+                        f"{self.base_url}/api/generate",
+                        **body
+                    ) as response:
                         response.raise_for_status()
 
-                        result = response.json()
-                        return result.get("response", "")
+                        for line in _iter_ndjson_lines(response.iter_bytes()):
+                            chunk = _response_text(line)
+                            if chunk:
+                                full_response += chunk
+                                if progress_callback:
+                                    progress_callback(chunk)
+                                # Check stop condition
+                                if stop_condition and stop_condition(full_response):
+                                    logger.info("Stop condition met, ending generation early")
+                                    stopped_early = True
+                                    break
+
+                    return full_response
+                else:
+                    # Non-streaming mode (original behavior)
+                    response = self._http.post(
+                        f"{self.base_url}/api/generate",
+                        **body
+                    )
+                    response.raise_for_status()
+
+                    result = response.json()
+                    return result.get("response", "")
 
             except httpx.TimeoutException:
                 if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Timeout, retrying in {wait_time}s...")
+                    wait_time = _backoff_delay(attempt)
+                    logger.warning(f"Timeout, retrying in {wait_time:.1f}s...")
                     time.sleep(wait_time)
                 else:
                     logger.error("Max retries exceeded")
@@ -248,24 +582,127 @@ class OllamaClient:
 
         return None
 
+    async def agenerate_text(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        stream: bool = False,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        stop_condition: Optional[Callable[[str], bool]] = None,
+        keep_alive: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Async version of generate_text for running several requests concurrently.
+
+        Availability is not re-checked per call; check once before dispatching.
+        Call aclose() before the event loop ends.
+
+        Args:
+            prompt: Text prompt
+            system: Optional system message
+            temperature: Sampling temperature
+            stream: Whether to stream the response
+            progress_callback: Optional callback function(chunk: str) for streaming
+                updates; may be a coroutine function
+            stop_condition: Optional callback(full_text) -> bool that returns True to stop generation early
+            keep_alive: How long to keep the model (and its prompt cache) loaded, e.g. "30m"
+            options: Extra Ollama model options (e.g. num_predict, stop)
+
+        Returns:
+            Generated text or None if failed
+        """
+        http = self._get_async_http()
+
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": temperature,
+                **(options or {})
+            }
+        }
+
+        if system:
+            payload["system"] = system
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        body = self._generate_body(payload)
+
+        for attempt in range(self.max_retries):
+            try:
+                if stream:
+                    full_response = ""
+                    async with http.stream(
+                        "POST",
+                        f"{self.base_url}/api/generate",
+                        **body
+                    ) as response:
+                        response.raise_for_status()
+
+                        async for line in _aiter_ndjson_lines(response.aiter_bytes()):
+                            chunk = _response_text(line)
+                            if chunk:
+                                full_response += chunk
+                                if progress_callback:
+                                    # Plain functions and coroutine functions both work
+                                    result = progress_callback(chunk)
+                                    if inspect.isawaitable(result):
+                                        await result
+                                if stop_condition and stop_condition(full_response):
+                                    logger.info("Stop condition met, ending generation early")
+                                    break
+
+                    return full_response
+                else:
+                    response = await http.post(
+                        f"{self.base_url}/api/generate",
+                        **body
+                    )
+                    response.raise_for_status()
+                    return response.json().get("response", "")
+
+            except httpx.TimeoutException:
+                if attempt < self.max_retries - 1:
+                    wait_time = _backoff_delay(attempt)
+                    logger.warning(f"Timeout, retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.error("Max retries exceeded")
+                    return None
+            except Exception as e:
+                logger.error(f"Error generating text: {e}")
+                return None
+
+        return None
+
     def get_model_info(self) -> Optional[Dict[str, Any]]:
         """
         Get information about the current model.
 
+        A successful response is cached per model until reload() is called.
+
         Returns:
             Model information dictionary, or None if failed
         """
-        try:
-            with httpx.Client(timeout=5.0) as client:
-                response = client.post(
-                    f"{self.base_url}/api/show",
-                    json={"name": self.model}
-                )
+        if self.model in self._model_info_cache:
+            return self._model_info_cache[self.model]
 
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return None
+        try:
+            response = self._http.post(
+                f"{self.base_url}/api/show",
+                json={"name": self.model},
+                timeout=5.0
+            )
+
+            if response.status_code == 200:
+                model_info = response.json()
+                self._model_info_cache[self.model] = model_info
+                return model_info
+            else:
+                return None
 
         except Exception as e:
             logger.debug(f"Failed to get model info: {e}")
@@ -275,9 +712,15 @@ class OllamaClient:
         """
         Get the model's context length (max tokens).
 
+        The value is fetched from /api/show once per model and cached until
+        reload() is called.
+
         Returns:
             Context length in tokens, or default of 8192 if unknown
         """
+        if self.model in self._context_length_cache:
+            return self._context_length_cache[self.model]
+
         model_info = self.get_model_info()
         if model_info:
             # Try to find context_length in model_info
@@ -285,16 +728,27 @@ class OllamaClient:
             # Look for context_length key with different possible prefixes
             for key in model_details:
                 if 'context_length' in key:
+                    self._context_length_cache[self.model] = model_details[key]
                     return model_details[key]
-        # Default context length if we can't determine it
+        # Default context length if we can't determine it (not cached, so
+        # a later call can still pick up the real value)
         return 8192
 
+    def reload(self) -> None:
+        """Forget cached model details, e.g. after the model was re-pulled."""
+        self._model_info_cache.clear()
+        self._context_length_cache.clear()
+        self._availability_checked = None
+
     def estimate_tokens(self, text: str) -> int:
         """
-        Estimate token count for text (rough approximation).
+        Estimate token count for text.
 
-        Uses ~4 characters per token as a rough estimate.
-        This is conservative for most models.
+        Uses the model's own tokenizer when one was configured and can be
+        loaded. Otherwise uses tiktoken's cl100k_base encoding when tiktoken
+        is installed. It is not the Ollama model's tokenizer, but it tracks it
+        far more closely than a character count, so less content is truncated
+        needlessly. Without either, falls back to ~4 UTF-8 bytes per token.
 
         Args:
             text: Text to estimate tokens for
@@ -302,5 +756,16 @@ class OllamaClient:
         Returns:
             Estimated token count
         """
-        # Rough estimate: ~4 chars per token (conservative)
-        return len(text) // 4
+        if self.tokenizer:
+            model_tokenizer = _get_hf_tokenizer(self.tokenizer)
+            if model_tokenizer is not None:
+                return len(model_tokenizer.encode(text, add_special_tokens=False).ids)
+
+        encoding = _get_token_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+
+        # Rough estimate: ~4 bytes per token. Counting bytes rather than
+        # characters keeps the estimate conservative for math symbols and
+        # other non-ASCII text, which take more tokens per character
+        return len(text.encode('utf-8')) // 4
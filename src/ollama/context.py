@@ -2,13 +2,66 @@
 Utility for extracting page context from markdown files to enhance image descriptions.
 """
 
+import functools
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Page heading written by the markdown generator, and the start of the next
+# page's heading, which ends the previous page's section
+PAGE_HEADING_PATTERN = re.compile(r'## Page (\d+)\n')
+NEXT_PAGE_PATTERN = re.compile(r'\n## Page \d+')
+
+# "Available Images" sections inserted by the markdown generator
+AVAILABLE_IMAGES_PATTERN = re.compile(r'### Available Images.*?(?=\n##|\Z)', re.DOTALL)
+
+# Markdown image syntax: ![filename](path)
+MARKDOWN_IMAGE_PATTERN = re.compile(r'!\[.*?\]\(.*?\)')
+
+# Runs of three or more newlines, and runs of spaces
+MULTI_NEWLINE_PATTERN = re.compile(r'\n{3,}')
+MULTI_SPACE_PATTERN = re.compile(r' +')
+
+
+@functools.lru_cache(maxsize=16)
+def _load_unit_pages(markdown_path: str, mtime_ns: int) -> Dict[str, str]:
+    """
+    Read a unit's markdown and split it into raw page sections in one pass.
+
+    Cached per file version, so describing many images from the same unit
+    reads and scans the file once.
+
+    Args:
+        markdown_path: Path to the unit's markdown file
+        mtime_ns: File modification time, so a regenerated file is re-read
+
+    Returns:
+        Dictionary mapping page number (as written in the heading) to the
+        text between its heading and the next page heading
+    """
+    with open(markdown_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    # Same sections as searching for each page's heading separately: the first
+    # heading for a page wins, and the last page stops before a final newline
+    pages = {}
+    for heading in PAGE_HEADING_PATTERN.finditer(content):
+        page = heading.group(1)
+        if page in pages:
+            continue
+
+        next_page = NEXT_PAGE_PATTERN.search(content, heading.end())
+        if next_page:
+            end = next_page.start()
+        else:
+            end = len(content) - 1 if content.endswith('\n') else len(content)
+        pages[page] = content[heading.end():end]
+
+    return pages
+
 
 def extract_page_text(unit_name: str, page_number: int, max_chars: int = 500) -> Optional[str]:
     """
@@ -32,21 +85,14 @@ def extract_page_text(unit_name: str, page_number: int, max_chars: int = 500) ->
     if not markdown_path.exists():
         raise FileNotFoundError(f"Markdown file not found: {markdown_path}")
 
-    # Read the markdown file
-    with open(markdown_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Page sections: ## Page {page_number} ... until next ## Page or end of file
+    pages = _load_unit_pages(str(markdown_path), markdown_path.stat().st_mtime_ns)
+    page_text = pages.get(str(page_number))
 
-    # Find the page section using regex
-    # Pattern: ## Page {page_number} ... until next ## Page or end of file
-    pattern = rf"## Page {page_number}\n(.*?)(?=\n## Page \d+|$)"
-    match = re.search(pattern, content, re.DOTALL)
-
-    if not match:
+    if page_text is None:
         logger.warning(f"Page {page_number} not found in {unit_name}")
         return None
 
-    page_text = match.group(1)
-
     # Clean the text
     cleaned_text = _clean_page_text(page_text, max_chars)
 
@@ -65,14 +111,14 @@ def _clean_page_text(text: str, max_chars: int) -> str:
         Cleaned text
     """
     # Remove "Available Images" sections and image references
-    text = re.sub(r'### Available Images.*?(?=\n##|\Z)', '', text, flags=re.DOTALL)
+    text = AVAILABLE_IMAGES_PATTERN.sub('', text)
 
     # Remove markdown image syntax: ![filename](path)
-    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+    text = MARKDOWN_IMAGE_PATTERN.sub('', text)
 
     # Remove extra whitespace and newlines
-    text = re.sub(r'\n{3,}', '\n\n', text)  # Replace 3+ newlines with 2
-    text = re.sub(r' +', ' ', text)  # Replace multiple spaces with single space
+    text = MULTI_NEWLINE_PATTERN.sub('\n\n', text)  # Replace 3+ newlines with 2
+    text = MULTI_SPACE_PATTERN.sub(' ', text)  # Replace multiple spaces with single space
     text = text.strip()
 
     # Truncate if needed
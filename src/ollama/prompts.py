@@ -2,7 +2,30 @@
 Prompt templates for image description using vision models.
 """
 
+import functools
 
+
+# Image description prompt when text from the image's page is available
+IMAGE_PROMPT_WITH_CONTEXT = """This image appears on page {page} of {subject_context}.
+
+Page context: {page_context}
+
+Describe this image in 50-100 words, focusing on how it illustrates the concepts from this page. Include the image type and key visual elements."""
+
+# Fallback image description prompt without page text
+IMAGE_PROMPT_WITHOUT_CONTEXT = """Describe this image from {subject_context} {page_info} in 50-100 words.
+
+Include:
+- Type (diagram, network architecture, algorithm, graph, formula, or table)
+- Main concept shown
+- Key visual elements
+
+Be concise and technical."""
+
+
+# Images on the same page share page number and context, so their prompt
+# is only formatted once
+@functools.lru_cache(maxsize=512)
 def get_image_description_prompt(
     page_number: int = None,
     page_context: str = None,
@@ -21,24 +44,15 @@ def get_image_description_prompt(
     """
     # Build contextual prompt if page context is available
     if page_context:
-        prompt = f"""This image appears on page {page_number if page_number else 'N'} of {subject_context}.
-
-Page context: {page_context[:300]}
-
-Describe this image in 50-100 words, focusing on how it illustrates the concepts from this page. Include the image type and key visual elements."""
-    else:
-        # Fallback to basic prompt
-        page_info = f"(page {page_number})" if page_number else ""
-        prompt = f"""Describe this image from {subject_context} {page_info} in 50-100 words.
-
-Include:
-- Type (diagram, network architecture, algorithm, graph, formula, or table)
-- Main concept shown
-- Key visual elements
-
-Be concise and technical."""
-
-    return prompt
+        return IMAGE_PROMPT_WITH_CONTEXT.format(
+            page=page_number if page_number else 'N',
+            subject_context=subject_context,
+            page_context=page_context[:300]
+        )
+
+    # Fallback to basic prompt
+    page_info = f"(page {page_number})" if page_number else ""
+    return IMAGE_PROMPT_WITHOUT_CONTEXT.format(subject_context=subject_context, page_info=page_info)
 
 
 def get_detailed_description_prompt(subject_context: str = "lecture slides") -> str:
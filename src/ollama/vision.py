@@ -3,18 +3,41 @@ Vision-specific logic for image description using Ollama.
 """
 
 import logging
-from pathlib import Path
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from typing import Optional, List, Dict
 
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.console import Console
 
 from src.ollama.client import OllamaClient
-from src.ollama.prompts import get_image_description_prompt
+from src.ollama.context import extract_page_text
+from src.ollama.prompts import get_image_description_prompt, get_quick_categorization_prompt
 from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Descriptions are written to the metadata journal in groups of this many
+DESCRIPTION_FLUSH_SIZE = 32
+
+# Keywords identifying each image type; the first type with a match wins
+TYPE_KEYWORDS = {
+    'network': ('network', 'network diagram', 'network structure'),
+    'algorithm': ('algorithm', 'flowchart', 'flow chart', 'pseudocode'),
+    'formula': ('formula', 'equation', 'mathematical expression'),
+    'table': ('table', 'comparison table', 'matrix'),
+    'graph': ('graph', 'plot', 'chart'),
+    'example': ('example', 'worked example', 'problem')
+}
+
+# The same keywords flattened to (keyword, type) pairs in priority order
+TYPE_LOOKUP = tuple(
+    (keyword, img_type)
+    for img_type, keywords in TYPE_KEYWORDS.items()
+    for keyword in keywords
+)
+
 
 def describe_image(
     image_path: str,
@@ -30,14 +53,16 @@ def describe_image(
         image_path: Path to image file
         page_number: Optional page number for context
         unit_name: Optional unit name for extracting page context
-        client: Optional OllamaClient instance (creates new one if None)
+        client: Optional OllamaClient instance (a new one is created and
+            closed afterwards if None)
         config: Optional Config instance for subject context
 
     Returns:
         Image description string, or None if failed
     """
     if client is None:
-        client = OllamaClient()
+        with OllamaClient() as client:
+            return describe_image(image_path, page_number, unit_name, client, config)
 
     if config is None:
         config = Config()
@@ -47,18 +72,44 @@ def describe_image(
         logger.warning("Ollama not available, skipping description")
         return None
 
+    return _describe_available(image_path, page_number, unit_name, client, _subject_context(config))
+
+
+def _subject_context(config: Config) -> str:
+    """Get the subject description used in image prompts."""
+    return config.get('ollama.subject_context', f'{config.subject_field} lecture slides')
+
+
+def _describe_available(
+    image_path: str,
+    page_number: Optional[int],
+    unit_name: Optional[str],
+    client: OllamaClient,
+    subject_context: str
+) -> Optional[str]:
+    """
+    Describe one image once the caller has checked that Ollama is available.
+
+    Args:
+        image_path: Path to image file
+        page_number: Optional page number for context
+        unit_name: Optional unit name for extracting page context
+        client: OllamaClient instance
+        subject_context: Subject description for the prompt
+
+    Returns:
+        Image description string, or None if failed
+    """
+    image_name = os.path.basename(image_path)
+
     # Extract page context if unit info available
     page_context = None
     if unit_name and page_number:
-        from src.ollama.context import extract_page_text
         try:
             page_context = extract_page_text(unit_name, page_number)
         except Exception as e:
             logger.warning(f"Failed to extract page context: {e}")
 
-    # Get subject context from config
-    subject_context = config.get('ollama.subject_context', f'{config.subject_field} lecture slides')
-
     # Generate prompt with context
     prompt = get_image_description_prompt(page_number, page_context, subject_context)
 
@@ -67,14 +118,14 @@ def describe_image(
         description = client.generate_with_image(prompt, image_path)
 
         if description:
-            logger.info(f"Generated description for {Path(image_path).name}")
+            logger.info(f"Generated description for {image_name}")
             return description
         else:
-            logger.warning(f"Failed to generate description for {Path(image_path).name}")
+            logger.warning(f"Failed to generate description for {image_name}")
             return None
 
     except Exception as e:
-        logger.error(f"Error describing {Path(image_path).name}: {e}")
+        logger.error(f"Error describing {image_name}: {e}")
         return None
 
 
@@ -93,13 +144,17 @@ def describe_images_batch(
         client: Optional OllamaClient instance
         console: Optional Rich Console for output
         progress: Whether to show progress bar
-        config: Optional Config instance for subject context
+        config: Optional Config instance for subject context and the
+            number of concurrent requests (ollama.max_parallel)
 
     Returns:
         Number of images successfully described
     """
     if client is None:
-        client = OllamaClient()
+        # One client for the whole batch, so every image reuses its pooled
+        # keep-alive connection; closed once the batch is done
+        with OllamaClient() as client:
+            return describe_images_batch(metadata_store, client, console, progress, config)
 
     if console is None:
         console = Console()
@@ -115,48 +170,56 @@ def describe_images_batch(
         logger.info("All images already have descriptions")
         return 0
 
-    logger.info(f"Describing {len(undescribed)} images...")
+    # Checked once for the whole batch
+    if not client.check_availability():
+        logger.warning("Ollama not available, skipping descriptions")
+        return 0
 
-    described_count = 0
+    logger.info(f"Describing {len(undescribed)} images...")
 
-    if progress:
-        # Process with progress bar
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console
-        ) as prog:
+    # Same for every image, so looked up once
+    subject_context = _subject_context(config)
 
+    described_count = 0
+    max_workers = max(1, min(config.ollama_max_parallel, len(undescribed)))
+
+    # Requests run on worker threads (the pooled HTTP client is thread-safe);
+    # results are stored from this thread as they finish, so the metadata
+    # store is never written concurrently
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    pending_updates = []
+    try:
+        futures = {
+            executor.submit(
+                _describe_available, img['path'], img.get('page'), img.get('unit'), client, subject_context
+            ): img['filename']
+            for img in undescribed
+        }
+
+        with _progress_bar(console, progress) as prog:
             task = prog.add_task(
                 "[cyan]Describing images...",
                 total=len(undescribed)
-            )
+            ) if prog is not None else None
 
-            for img in undescribed:
-                filename = img['filename']
-                image_path = img['path']
-                page = img.get('page')
-                unit = img.get('unit')
-
-                prog.update(task, description=f"[cyan]Describing {filename}...")
+            for future in as_completed(futures):
+                filename = futures[future]
 
                 try:
-                    description = describe_image(image_path, page, unit, client, config)
+                    description = future.result()
 
                     if description:
                         # Extract type and math info from description
-                        img_type = extract_type_from_description(description)
-                        contains_math = 'yes' in description.lower() or 'math' in description.lower()
+                        description_lower = description.lower()
+                        img_type = _type_from_lowered(description_lower)
+                        contains_math = 'yes' in description_lower or 'math' in description_lower
 
-                        # Update metadata
-                        metadata_store.update_description(
-                            filename,
-                            description,
-                            img_type=img_type,
-                            contains_math=contains_math
-                        )
+                        # Update metadata, one journal write per group
+                        pending_updates.append((filename, description, img_type, contains_math))
+                        if len(pending_updates) >= DESCRIPTION_FLUSH_SIZE:
+                            metadata_store.update_descriptions(pending_updates)
+                            pending_updates = []
 
                         described_count += 1
                     else:
@@ -165,38 +228,36 @@ def describe_images_batch(
                 except Exception as e:
                     logger.error(f"Failed to describe {filename}: {e}")
 
-                prog.advance(task)
+                if prog is not None:
+                    prog.update(task, description=f"[cyan]Described {filename}")
+                    prog.advance(task)
+    finally:
+        # Don't start queued images after an error or Ctrl+C
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
 
-    else:
-        # Process without progress bar
-        for img in undescribed:
-            filename = img['filename']
-            image_path = img['path']
-            page = img.get('page')
-            unit = img.get('unit')
+        # Keep descriptions already generated, even if the batch was cut short
+        if pending_updates:
+            metadata_store.update_descriptions(pending_updates)
 
-            try:
-                description = describe_image(image_path, page, unit, client, config)
+    logger.info(f"Successfully described {described_count}/{len(undescribed)} images")
 
-                if description:
-                    img_type = extract_type_from_description(description)
-                    contains_math = 'yes' in description.lower() or 'math' in description.lower()
+    return described_count
 
-                    metadata_store.update_description(
-                        filename,
-                        description,
-                        img_type=img_type,
-                        contains_math=contains_math
-                    )
 
-                    described_count += 1
+def _progress_bar(console: Console, enabled: bool):
+    """Get a Rich progress bar for the batch, or a no-op context if disabled."""
+    if not enabled:
+        return nullcontext()
 
-            except Exception as e:
-                logger.error(f"Failed to describe {filename}: {e}")
-
-    logger.info(f"Successfully described {described_count}/{len(undescribed)} images")
-
-    return described_count
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=console
+    )
 
 
 def extract_type_from_description(description: str) -> str:
@@ -209,20 +270,14 @@ def extract_type_from_description(description: str) -> str:
     Returns:
         Image type (network, algorithm, diagram, etc.)
     """
-    description_lower = description.lower()
+    return _type_from_lowered(description.lower())
 
+
+def _type_from_lowered(description_lower: str) -> str:
+    """Get the image type from an already lowercased description."""
     # Check for specific types
-    type_keywords = {
-        'network': ['network', 'network diagram', 'network structure'],
-        'algorithm': ['algorithm', 'flowchart', 'flow chart', 'pseudocode'],
-        'formula': ['formula', 'equation', 'mathematical expression'],
-        'table': ['table', 'comparison table', 'matrix'],
-        'graph': ['graph', 'plot', 'chart'],
-        'example': ['example', 'worked example', 'problem']
-    }
-
-    for img_type, keywords in type_keywords.items():
-        if any(keyword in description_lower for keyword in keywords):
+    for keyword, img_type in TYPE_LOOKUP:
+        if keyword in description_lower:
             return img_type
 
     # Default type
@@ -244,9 +299,8 @@ def categorize_image(
         Dictionary with type, topic, and math info
     """
     if client is None:
-        client = OllamaClient()
-
-    from src.ollama.prompts import get_quick_categorization_prompt
+        with OllamaClient() as client:
+            return categorize_image(image_path, client)
 
     prompt = get_quick_categorization_prompt()
 
@@ -5,28 +5,149 @@ PDF processing module for extracting text and images.
 import os
 import io
 import logging
-from typing import List, Dict, Tuple
+import re
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import suppress
+from typing import List, Dict, Optional, Sequence, Tuple
 from pathlib import Path
 
 import fitz  # PyMuPDF
 from PIL import Image
 
+logger = logging.getLogger(__name__)
+
+
+# PDFs with fewer pages are extracted in-process; starting workers costs more
+PARALLEL_MIN_PAGES = 32
+
+# Default number of text extraction worker processes
+TEXT_WORKERS = min(os.cpu_count() or 1, 4)
+
+# PDFs with fewer images to save are extracted in-process
+PARALLEL_MIN_IMAGES = 16
+
+# Default number of image extraction worker processes
+IMAGE_WORKERS = min(os.cpu_count() or 1, 6)
+
+# Threads per extraction process that encode and write PNGs
+IMAGE_WRITE_THREADS = 4
+
+# Lines starting with one of these words are treated as headings
+HEADING_INDICATOR_PATTERN = re.compile(
+    'Chapter|Section|Unit|Lecture|Introduction|Overview|Summary'
+    '|Definition|Theorem|Lemma|Proof'
+)
+
+# Patterns that suggest mathematical content
+MATH_PATTERN = re.compile('|'.join([
+    r'[=≠≈∝∈∉⊂⊃∩∪∀∃]',  # Math symbols
+    r'[α-ωΑ-Ω]',  # Greek letters
+    r'\b[PpEe]\s*\(',  # Probability notation P(...), E(...)
+    r'∑|∏|∫|∂',  # Summation, product, integral, partial
+    r'\^\s*\d+',  # Superscripts
+    r'_\s*\d+',  # Subscripts
+]))
+
+
+def _page_text_entry(page, page_num: int) -> Tuple[Dict, Optional[List[tuple]]]:
+    """
+    Extract one page's text and image count into a page dictionary.
+
+    Returns:
+        Tuple of (page dictionary, the page's image table or None if failed)
+    """
+    try:
+        # Extract text with layout preservation
+        text = page.get_text("text")
+
+        # Check if page has images
+        images = page.get_images()
+
+        logger.debug(f"Page {page_num + 1}: {len(text)} chars, {len(images)} images")
+        return {
+            "page_num": page_num + 1,  # 1-indexed
+            "text": text,
+            "has_images": len(images) > 0,
+            "image_count": len(images)
+        }, images
+
+    except Exception as e:
+        logger.warning(f"Failed to extract text from page {page_num + 1}: {e}")
+        return {
+            "page_num": page_num + 1,
+            "text": "",
+            "has_images": False,
+            "image_count": 0,
+            "error": str(e)
+        }, None
+
+
+def _extract_pages_worker(
+    pdf_path: str,
+    page_indices: Sequence[int]
+) -> List[Tuple[Dict, Optional[List[tuple]]]]:
+    """
+    Extract text from a range of pages in a worker process.
+
+    Each worker opens its own document; fitz handles can't be shared
+    between processes.
+
+    Args:
+        pdf_path: Path to PDF file
+        page_indices: 0-indexed page numbers to extract
+
+    Returns:
+        _page_text_entry results in the order of page_indices
+    """
+    with fitz.open(pdf_path) as doc:
+        return [_page_text_entry(doc[page_num], page_num) for page_num in page_indices]
+
+
+def _write_png(
+    image,
+    width: int,
+    height: int,
+    filepath: str,
+    compress_level: int
+) -> Tuple[int, int]:
+    """Save image data from _extract_image_data as a PNG file and return its size."""
+    # Save image, as-is if it's already PNG-encoded
+    if isinstance(image, bytes):
+        with open(filepath, 'wb') as f:
+            f.write(image)
+    else:
+        image.save(filepath, format='PNG', compress_level=compress_level, optimize=False)
+    return width, height
+
+
+def _split_evenly(items: Sequence, parts: int) -> List[Sequence]:
+    """Split a sequence into at most `parts` contiguous, similarly sized slices."""
+    size = -(-len(items) // parts)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
 
 class PDFProcessor:
     """Extract text and images from PDF files."""
 
-    def __init__(self, pdf_path: str, unit_name: str = None):
+    def __init__(self, pdf_path: str, unit_name: str = None, png_compress_level: int = 1):
         """
         Initialize PDF processor.
 
         Args:
             pdf_path: Path to PDF file
             unit_name: Name of the unit (for image naming)
+            png_compress_level: zlib level (0-9) for re-encoded PNGs; low
+                levels save much faster at the cost of larger files
         """
         self.logger = logging.getLogger(__name__)
         self.pdf_path = pdf_path
         self.unit_name = unit_name or Path(pdf_path).stem
+        self.png_compress_level = png_compress_level
         self.doc = None
+        # Page index -> page.get_images() result, filled by extract_text_by_page
+        self._page_images = {}
         self._open_pdf()
 
     def _open_pdf(self) -> None:
@@ -43,6 +164,7 @@ class PDFProcessor:
         if self.doc:
             self.doc.close()
             self.doc = None
+        self._page_images.clear()
 
     def __enter__(self):
         """Context manager entry."""
@@ -52,144 +174,261 @@ class PDFProcessor:
         """Context manager exit."""
         self.close()
 
-    def extract_text_by_page(self) -> List[Dict]:
+    def extract_text_by_page(self, max_workers: Optional[int] = None) -> List[Dict]:
         """
         Extract text from PDF page by page.
 
+        Larger PDFs are split into contiguous page ranges that are extracted
+        in separate processes, since PyMuPDF holds the GIL while parsing.
+
+        Args:
+            max_workers: Number of worker processes (default: TEXT_WORKERS);
+                1 extracts everything in this process
+
         Returns:
             List of dictionaries with page information:
             [{"page_num": 1, "text": "...", "has_images": True}, ...]
         """
-        pages_data = []
+        page_count = self.doc.page_count
+        workers = min(max_workers or TEXT_WORKERS, page_count)
 
-        for page_num in range(self.doc.page_count):
-            page = self.doc[page_num]
-
-            try:
-                # Extract text with layout preservation
-                text = page.get_text("text")
-
-                # Check if page has images
-                images = page.get_images()
-                has_images = len(images) > 0
-
-                pages_data.append({
-                    "page_num": page_num + 1,  # 1-indexed
-                    "text": text,
-                    "has_images": has_images,
-                    "image_count": len(images)
-                })
-
-                self.logger.debug(
-                    f"Page {page_num + 1}: {len(text)} chars, {len(images)} images"
-                )
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            results = [
+                _page_text_entry(self.doc[page_num], page_num)
+                for page_num in range(page_count)
+            ]
+        else:
+            chunks = _split_evenly(range(page_count), workers)
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                # map yields chunk results in submission order, i.e. page order
+                results = [
+                    result
+                    for chunk_results in pool.map(
+                        _extract_pages_worker, [self.pdf_path] * len(chunks), chunks
+                    )
+                    for result in chunk_results
+                ]
 
-            except Exception as e:
-                self.logger.warning(f"Failed to extract text from page {page_num + 1}: {e}")
-                pages_data.append({
-                    "page_num": page_num + 1,
-                    "text": "",
-                    "has_images": False,
-                    "image_count": 0,
-                    "error": str(e)
-                })
+        pages_data = []
+        for page_num, (entry, images) in enumerate(results):
+            pages_data.append(entry)
+            # Keep the image tables so extract_images doesn't walk them again
+            if images is not None:
+                self._page_images[page_num] = images
 
         self.logger.info(f"Extracted text from {len(pages_data)} pages")
         return pages_data
 
+    def extract_all(self) -> Dict[int, Dict]:
+        """
+        Extract text, headings, math lines and image tables for every page.
+
+        Each page's text is laid out once and shared by heading and math
+        detection. Calling detect_headings / extract_mathematical_content on
+        extract_text_by_page() output still works the same way.
+
+        Returns:
+            Dictionary keyed by 1-indexed page number:
+            {1: {"text": "...", "headings": [...], "math": [...], "images": [...]}, ...}
+        """
+        pages = {}
+        for entry in self.extract_text_by_page():
+            page_num, text = entry["page_num"], entry["text"]
+            pages[page_num] = {
+                "text": text,
+                "headings": self.detect_headings(text),
+                "math": self.extract_mathematical_content(text),
+                "images": self._page_images.get(page_num - 1, [])
+            }
+
+        return pages
+
     def extract_images(
         self,
         output_dir: str,
-        min_size: Tuple[int, int] = (100, 100)
+        min_size: Tuple[int, int] = (100, 100),
+        max_workers: Optional[int] = None
     ) -> List[Dict]:
         """
         Extract images from PDF with enhanced metadata.
 
+        When there are enough images, decoding and PNG encoding are spread
+        over worker processes. Each image is first written under a temporary
+        name and only numbered once every result is back, so file names are
+        consecutive in page order and images that fail to decode or are too
+        small leave no gaps.
+
         Args:
             output_dir: Directory to save images
             min_size: Minimum image size (width, height) to extract
+            max_workers: Number of worker processes (default: IMAGE_WORKERS);
+                1 extracts everything in this process
 
         Returns:
             List of dictionaries with image information:
             [{"page": 1, "path": "...", "filename": "...", "dimensions": {...},
               "extracted_at": "...", ...}, ...]
         """
-        from datetime import datetime
         from src.utils import ensure_dir
 
         ensure_dir(output_dir)
-        extracted_images = []
-        image_counter = 1
 
+        # (page_num, img_index, xref, temporary path) per image to save
+        jobs = []
         for page_num in range(self.doc.page_count):
-            page = self.doc[page_num]
-            images = page.get_images()
+            images = self._page_images.get(page_num)
+            if images is None:
+                images = self.doc[page_num].get_images()
 
             for img_index, img_info in enumerate(images):
-                try:
-                    xref = img_info[0]
-                    img_data = self._extract_image_data(xref)
-
-                    if not img_data:
-                        continue
-
-                    img_obj, width, height = img_data
-
-                    # Filter by minimum size
-                    if width < min_size[0] or height < min_size[1]:
-                        self.logger.debug(
-                            f"Skipping small image on page {page_num + 1}: {width}x{height}"
-                        )
-                        continue
-
-                    # Generate filename: unit1_page03_img01.png
-                    filename = f"{self.unit_name}_page{page_num + 1:02d}_img{image_counter:02d}.png"
-                    filepath = os.path.join(output_dir, filename)
-
-                    # Save image
-                    img_obj.save(filepath, format='PNG')
-
-                    # Enhanced metadata
-                    extracted_images.append({
-                        "filename": filename,
-                        "page": page_num + 1,
-                        "path": filepath,
-                        "image_path": filepath,  # Backwards compatibility
-                        "dimensions": {
-                            "width": width,
-                            "height": height
-                        },
-                        "width": width,  # Backwards compatibility
-                        "height": height,  # Backwards compatibility
-                        "extracted_at": datetime.now().isoformat(),
-                        "unit": self.unit_name
-                    })
-
-                    self.logger.debug(f"Extracted image: {filename} ({width}x{height})")
-                    image_counter += 1
-
-                except Exception as e:
-                    self.logger.warning(
-                        f"Failed to extract image {img_index} from page {page_num + 1}: {e}"
+                tmp_name = f".{self.unit_name}_page{page_num + 1:02d}_{img_index}.png.part"
+                jobs.append((page_num, img_index, img_info[0], os.path.join(output_dir, tmp_name)))
+
+        workers = min(max_workers or IMAGE_WORKERS, len(jobs))
+        if workers <= 1 or len(jobs) < PARALLEL_MIN_IMAGES:
+            results = self._save_images(jobs, min_size)
+        else:
+            chunks = _split_evenly(jobs, workers)
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                results = [
+                    dims
+                    for chunk_results in pool.map(
+                        _save_images_worker,
+                        [self.pdf_path] * len(chunks),
+                        [self.unit_name] * len(chunks),
+                        [self.png_compress_level] * len(chunks),
+                        [min_size] * len(chunks),
+                        chunks
                     )
+                    for dims in chunk_results
+                ]
+
+        # All images from one run share the extraction timestamp
+        extracted_at = datetime.now().isoformat()
+        extracted_images = []
+        image_counter = 1
+        for (page_num, img_index, _, tmp_path), dims in zip(jobs, results):
+            if dims is None:
+                continue
+
+            width, height = dims
+
+            # Generate filename: unit1_page03_img01.png
+            filename = f"{self.unit_name}_page{page_num + 1:02d}_img{image_counter:02d}.png"
+            filepath = os.path.join(output_dir, filename)
+            try:
+                os.replace(tmp_path, filepath)
+            except OSError as e:
+                self.logger.warning(
+                    f"Failed to extract image {img_index} from page {page_num + 1}: {e}"
+                )
+                continue
+
+            self.logger.debug(f"Extracted image: {filename} ({width}x{height})")
+            image_counter += 1
+
+            # Enhanced metadata
+            extracted_images.append({
+                "filename": filename,
+                "page": page_num + 1,
+                "path": filepath,
+                "image_path": filepath,  # Backwards compatibility
+                "dimensions": {
+                    "width": width,
+                    "height": height
+                },
+                "width": width,  # Backwards compatibility
+                "height": height,  # Backwards compatibility
+                "extracted_at": extracted_at,
+                "unit": self.unit_name
+            })
 
         self.logger.info(f"Extracted {len(extracted_images)} images")
         return extracted_images
 
+    def _save_images(
+        self,
+        jobs: Sequence[Tuple[int, int, int, str]],
+        min_size: Tuple[int, int]
+    ) -> List[Optional[Tuple[int, int]]]:
+        """
+        Decode images and save them as PNG.
+
+        Images are pulled out of the PDF on this thread, since PyMuPDF isn't
+        thread-safe, while PNG encoding and writing overlap on a small
+        thread pool.
+
+        Args:
+            jobs: (page_num, img_index, xref, path) tuples
+            min_size: Minimum decoded image size (width, height) to save
+
+        Returns:
+            (width, height) or None per job, in job order; None for images
+            that failed or were too small, which leave no file behind
+        """
+        results = [None] * len(jobs)
+        in_flight = deque()
+
+        def finish(index, future):
+            page_num, img_index, _, path = jobs[index]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                self.logger.warning(
+                    f"Failed to extract image {img_index} from page {page_num + 1}: {e}"
+                )
+                # Don't leave a partly written file behind
+                with suppress(OSError):
+                    os.remove(path)
+
+        with ThreadPoolExecutor(max_workers=IMAGE_WRITE_THREADS) as writer:
+            for index, (page_num, _, xref, path) in enumerate(jobs):
+                img_data = self._extract_image_data(xref)
+                if not img_data:
+                    continue
+
+                # Filter by minimum size
+                _, width, height = img_data
+                if width < min_size[0] or height < min_size[1]:
+                    self.logger.debug(
+                        f"Skipping small image on page {page_num + 1}: {width}x{height}"
+                    )
+                    continue
+
+                # Bound how many decoded images wait for the writers
+                if len(in_flight) >= 2 * IMAGE_WRITE_THREADS:
+                    finish(*in_flight.popleft())
+                in_flight.append((index, writer.submit(
+                    _write_png, *img_data, path, self.png_compress_level
+                )))
+
+            while in_flight:
+                finish(*in_flight.popleft())
+
+        return results
+
     def _extract_image_data(self, xref: int) -> Tuple:
         """
         Extract image data from xref.
 
+        8-bit gray or RGB images that PyMuPDF already hands out as PNG are
+        returned as their encoded bytes so they can be written unchanged;
+        everything else is decoded with PIL.
+
         Args:
             xref: Image cross-reference number
 
         Returns:
-            Tuple of (PIL.Image, width, height) or None if failed
+            Tuple of (PNG bytes or PIL.Image, width, height) or None if failed
         """
         try:
             base_image = self.doc.extract_image(xref)
             img_bytes = base_image["image"]
 
+            if (base_image.get("ext") == "png" and base_image.get("colorspace") in (1, 3)
+                    and base_image.get("bpc") == 8):
+                return img_bytes, base_image["width"], base_image["height"]
+
             # Open with PIL
             img = Image.open(io.BytesIO(img_bytes))
 
@@ -226,26 +465,11 @@ class PDFProcessor:
 
             # Heuristics for headings:
             # 1. All caps and reasonably short
-            # 2. Ends with colon
-            # 3. Contains common heading words
-
-            is_heading = False
-
-            # All caps and short (likely a section heading)
-            if line.isupper() and 5 < len(line) < 80:
-                is_heading = True
-
-            # Contains heading indicators
-            heading_indicators = [
-                'Chapter', 'Section', 'Unit', 'Lecture',
-                'Introduction', 'Overview', 'Summary',
-                'Definition', 'Theorem', 'Lemma', 'Proof'
-            ]
-
-            for indicator in heading_indicators:
-                if line.startswith(indicator):
-                    is_heading = True
-                    break
+            # 2. Starts with a common heading word
+            is_heading = (
+                (line.isupper() and 5 < len(line) < 80)
+                or HEADING_INDICATOR_PATTERN.match(line) is not None
+            )
 
             if is_heading:
                 headings.append(line)
@@ -262,25 +486,10 @@ class PDFProcessor:
         Returns:
             List of lines that likely contain mathematical notation
         """
-        import re
-
         math_lines = []
-        lines = text.split('\n')
-
-        # Patterns that suggest mathematical content
-        math_patterns = [
-            r'[=≠≈∝∈∉⊂⊃∩∪∀∃]',  # Math symbols
-            r'[α-ωΑ-Ω]',  # Greek letters
-            r'\b[PpEe]\s*\(',  # Probability notation P(...), E(...)
-            r'∑|∏|∫|∂',  # Summation, product, integral, partial
-            r'\^\s*\d+',  # Superscripts
-            r'_\s*\d+',  # Subscripts
-        ]
-
-        combined_pattern = '|'.join(math_patterns)
 
-        for line in lines:
-            if re.search(combined_pattern, line):
+        for line in text.split('\n'):
+            if MATH_PATTERN.search(line):
                 math_lines.append(line.strip())
 
         return math_lines
@@ -289,6 +498,22 @@ class PDFProcessor:
         """Get total number of pages."""
         return self.doc.page_count if self.doc else 0
 
+    @staticmethod
+    def read_page_count(pdf_path: str) -> int:
+        """
+        Get a PDF's page count without setting up a processor.
+
+        Only the document structure is read; no page content is parsed.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Returns:
+            Number of pages
+        """
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+
     def get_metadata(self) -> Dict:
         """
         Get PDF metadata.
@@ -307,3 +532,27 @@ class PDFProcessor:
         }
 
         return metadata
+
+
+def _save_images_worker(
+    pdf_path: str,
+    unit_name: str,
+    png_compress_level: int,
+    min_size: Tuple[int, int],
+    jobs: Sequence[Tuple[int, int, int, str]]
+) -> List[Optional[Tuple[int, int]]]:
+    """
+    Save a slice of extract_images' jobs in a worker process.
+
+    Args:
+        pdf_path: Path to PDF file
+        unit_name: Name of the unit
+        png_compress_level: zlib level for re-encoded PNGs
+        min_size: Minimum decoded image size (width, height) to save
+        jobs: (page_num, img_index, xref, path) tuples
+
+    Returns:
+        (width, height) or None per job, in job order
+    """
+    with PDFProcessor(pdf_path, unit_name, png_compress_level) as processor:
+        return processor._save_images(jobs, min_size)
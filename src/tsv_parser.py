@@ -13,6 +13,25 @@ from src.config import Config
 logger = logging.getLogger(__name__)
 
 
+def _append_card(cards: List[Dict[str, any]], line: str, line_num: int) -> None:
+    """Parse a stripped card line and append it to cards if it has 3 columns."""
+    # Split by tab
+    parts = line.split('\t')
+
+    # Validate 3 columns
+    if len(parts) != 3:
+        logger.warning(f"Skipping line {line_num}: Expected 3 columns, got {len(parts)}")
+        return
+
+    front, back, tags_str = parts
+
+    cards.append({
+        'front': front.strip(),
+        'back': back.strip(),
+        'tags': tags_str.split()  # Space-separated
+    })
+
+
 def parse_anki_tsv(file_path: str, config: Optional[Config] = None) -> Dict[str, any]:
     """
     Parse an Anki .txt file in TSV format.
@@ -38,32 +57,39 @@ def parse_anki_tsv(file_path: str, config: Optional[Config] = None) -> Dict[str,
     if config is None:
         config = Config()
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    # Parse headers and extract deck name
+    # Parse headers and extract deck name, then cards from the same stream
     deck_name = None
-    header_end = 0
-
-    for i, line in enumerate(lines):
-        line = line.strip()
-
-        # Skip empty lines at the start
-        if not line:
-            continue
-
-        # Parse headers
-        if line.startswith('#'):
-            if line.startswith('#deck:'):
-                deck_name = line[6:].strip()
-            header_end = i + 1
-        # First non-header, non-empty line should be column headers
-        elif 'Front' in line and 'Back' in line and 'Tags' in line:
-            header_end = i + 1
-            break
-        else:
-            # Found content before column headers
-            break
+    cards = []
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        numbered_lines = enumerate(f, start=1)
+
+        for line_num, line in numbered_lines:
+            line = line.strip()
+
+            # Skip empty lines at the start
+            if not line:
+                continue
+
+            # Parse headers
+            if line.startswith('#'):
+                if line.startswith('#deck:'):
+                    deck_name = line[6:].strip()
+            # First non-header, non-empty line should be column headers
+            elif 'Front' in line and 'Back' in line and 'Tags' in line:
+                break
+            else:
+                # Found content before column headers
+                _append_card(cards, line, line_num)
+                break
+
+        # Parse cards
+        for line_num, line in numbered_lines:
+            line = line.strip()
+
+            # Skip empty lines and comment lines
+            if line and not line.startswith('#'):
+                _append_card(cards, line, line_num)
 
     # Default deck name if not found
     if deck_name is None:
@@ -72,39 +98,6 @@ def parse_anki_tsv(file_path: str, config: Optional[Config] = None) -> Dict[str,
         subject_short = config.subject_short_name
         deck_name = f"{subject_short} - {unit_name}"
 
-    # Parse cards
-    cards = []
-
-    for i in range(header_end, len(lines)):
-        line = lines[i].strip()
-
-        # Skip empty lines
-        if not line:
-            continue
-
-        # Skip comment lines
-        if line.startswith('#'):
-            continue
-
-        # Split by tab
-        parts = line.split('\t')
-
-        # Validate 3 columns
-        if len(parts) != 3:
-            logger.warning(f"Skipping line {i+1}: Expected 3 columns, got {len(parts)}")
-            continue
-
-        front, back, tags_str = parts
-
-        # Parse tags (space-separated)
-        tags = tags_str.strip().split() if tags_str.strip() else []
-
-        cards.append({
-            'front': front.strip(),
-            'back': back.strip(),
-            'tags': tags
-        })
-
     logger.info(f"Parsed {len(cards)} cards from {file_path.name}")
 
     return {
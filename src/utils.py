@@ -2,10 +2,29 @@
 Utility functions for PDF to Anki flashcard generation.
 """
 
+import functools
 import os
+import json
 import logging
+import mmap
+import re
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Iterable, Union
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the standard library parser
+    orjson = None
+
+
+# JSON files at least this large are parsed straight from a memory map
+JSON_MMAP_MIN_BYTES = 1 << 20
+
+# Leading unit number in a unit name, e.g. "unit1" in "unit1_introduction"
+UNIT_NUMBER_PATTERN = re.compile(r'(unit\d+)')
+
+# Characters that aren't allowed in filenames
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
 
 
 def setup_logging(log_file: str = "outputs/processing.log", level=logging.INFO):
@@ -39,31 +58,50 @@ def ensure_dir(path: str) -> None:
     """
     Create directory if it doesn't exist.
 
+    Each path is only created once per process; later calls return without
+    touching the filesystem.
+
     Args:
         path: Directory path to create
     """
-    Path(path).mkdir(parents=True, exist_ok=True)
+    _ensure_dir_cached(os.fspath(path))
+
+
+@functools.lru_cache(maxsize=256)
+def _ensure_dir_cached(path: str) -> None:
+    """Create a directory and its parents, memoized per path."""
+    os.makedirs(path, exist_ok=True)
 
 
-def save_file(path: str, content: str, encoding: str = 'utf-8') -> None:
+def save_file(path: str, content: Union[str, Iterable[str]], encoding: str = 'utf-8') -> int:
     """
     Safely write content to a file.
 
     Args:
         path: File path to write to
-        content: Content to write
+        content: Content to write, either a string or an iterable of chunks
+            that are written as they are produced
         encoding: File encoding (default: utf-8)
+
+    Returns:
+        Number of characters written
     """
     # Ensure parent directory exists
     parent_dir = os.path.dirname(path)
     if parent_dir:
         ensure_dir(parent_dir)
 
+    if isinstance(content, str):
+        content = (content,)
+
+    written = 0
     with open(path, 'w', encoding=encoding) as f:
-        f.write(content)
+        for chunk in content:
+            written += f.write(chunk)
 
     logger = logging.getLogger(__name__)
     logger.info(f"Saved file: {path}")
+    return written
 
 
 def generate_report(stats: Dict[str, Any]) -> str:
@@ -118,8 +156,7 @@ def extract_unit_number(unit_name: str) -> str:
     Returns:
         Unit number like "unit1" or empty string if not found
     """
-    import re
-    match = re.match(r'(unit\d+)', unit_name)
+    match = UNIT_NUMBER_PATTERN.match(unit_name)
     return match.group(1) if match else ""
 
 
@@ -133,9 +170,8 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanitized filename
     """
-    import re
     # Remove or replace invalid filename characters
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    sanitized = INVALID_FILENAME_CHARS.sub('_', filename)
     # Remove leading/trailing whitespace and dots
     sanitized = sanitized.strip('. ')
     return sanitized
@@ -156,6 +192,53 @@ def read_file(path: str, encoding: str = 'utf-8') -> str:
         return f.read()
 
 
+def read_json(path: str) -> Any:
+    """
+    Read and parse a JSON file.
+
+    Uses orjson when it is installed (several times faster on large files),
+    otherwise the standard library json module. With orjson, large files
+    are parsed from a memory map instead of being copied into memory first.
+
+    Args:
+        path: File path to read from
+
+    Returns:
+        Parsed JSON data
+    """
+    with open(path, 'rb') as f:
+        if orjson is None:
+            return json.loads(f.read())
+
+        if os.fstat(f.fileno()).st_size < JSON_MMAP_MIN_BYTES:
+            return orjson.loads(f.read())
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # The view must be released before the map can be closed
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def write_json(path: str, data: Any, indent: bool = True) -> None:
+    """
+    Serialize data as UTF-8 JSON and write it to a file.
+
+    Uses orjson when it is installed, otherwise the standard library json
+    module. Non-ASCII text is written as-is rather than escaped.
+
+    Args:
+        path: File path to write to
+        data: JSON-serializable data
+        indent: Whether to pretty-print with two-space indentation
+    """
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0))
+        return
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2 if indent else None, ensure_ascii=False)
+
+
 def count_lines(text: str) -> int:
     """
     Count non-empty lines in text.
@@ -166,7 +249,7 @@ def count_lines(text: str) -> int:
     Returns:
         Number of non-empty lines
     """
-    return len([line for line in text.split('\n') if line.strip()])
+    return len(list(filter(None, map(str.strip, text.split('\n')))))
 
 
 def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str: